@@ -8,7 +8,8 @@ using LangGraph for workflow management with a modular UI structure.
 import streamlit as st
 import os
 import logging
-from state_schema import WorkflowState
+from typing import List
+from state_schema import new_workflow_state
 
 # Import CSS utilities
 from static.css_utils import load_css
@@ -16,19 +17,17 @@ from static.css_utils import load_css
 # Import language utilities
 from utils.language_utils import init_language, render_language_selector, t
 
-# Configure logging
-logging.getLogger('streamlit').setLevel(logging.ERROR)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging once per process; app.py is re-executed on every rerun
+if not logging.root.handlers:
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
 logger = logging.getLogger(__name__)
 
-# Import LLM Manager
-from llm_manager import LLMManager
-
-# Import LangGraph components
-from langgraph_workflow import JavaCodeReviewGraph
+# Heavy modules (LLM manager, LangGraph workflow, UI components) are imported
+# lazily in the functions that use them to keep worker cold start short.
 
 # Import modularized UI functions
 from ui.utils.main_ui import (
@@ -37,13 +36,6 @@ from ui.utils.main_ui import (
     create_enhanced_tabs
 )
 
-# Import UI components
-from ui.components.code_generator import CodeGeneratorUI
-from ui.components.code_display import CodeDisplayUI, render_review_tab  
-from ui.components.feedback_system import render_feedback_tab
-from ui.components.auth_ui import AuthUI
-
-
 # Set page config
 st.set_page_config(
     page_title="Java Code Review Trainer",
@@ -59,6 +51,104 @@ try:
 except Exception as e:
     logger.warning(f"CSS loading failed: {str(e)}")
 
+@st.cache_resource(show_spinner=False)
+def _ensure_schema() -> bool:
+    """
+    Apply database schema updates once per server process.
+    
+    Returns:
+        True once the schema is up to date
+    """
+    from db.schema_update import update_database_schema
+    if not update_database_schema():
+        # Raising keeps the failure out of the resource cache so the next rerun retries
+        raise RuntimeError("update_database_schema() reported failure")
+    return True
+
+@st.cache_resource(show_spinner=False)
+def get_llm_manager(api_key: str):
+    """
+    Build the LLM manager once per process with the Groq provider configured.
+    
+    Args:
+        api_key: Groq API key read by main(); a changed key builds a new manager
+    
+    Returns:
+        Shared LLMManager instance
+    """
+    from llm_manager import LLMManager
+    llm_manager = LLMManager()
+    # set_provider only records configuration; the Groq connection is probed
+    # lazily on first model use, so there is no network I/O to offload here
+    if not llm_manager.set_provider("groq", api_key):
+        # Raising keeps the failure out of the resource cache so the next rerun retries
+        raise RuntimeError("Failed to configure Groq provider. Please check your configuration.")
+    logger.debug("✅ Groq provider configured successfully")
+    return llm_manager
+
+@st.cache_resource(show_spinner=False)
+def get_workflow(_llm_manager, language: str):
+    """
+    Build the workflow graph once per process and language.
+    
+    Args:
+        _llm_manager: Shared LLMManager (underscore prefix excludes it from hashing)
+        language: Current UI language, since the error repository is language-specific
+        
+    Returns:
+        Shared JavaCodeReviewGraph instance
+    """
+    from langgraph_workflow import JavaCodeReviewGraph
+    return JavaCodeReviewGraph(_llm_manager)
+
+@st.cache_resource(show_spinner=False)
+def get_auth_ui():
+    """Return the shared AuthUI controller."""
+    from ui.components.auth_ui import AuthUI
+    return AuthUI()
+
+@st.cache_resource(show_spinner=False)
+def get_code_display_ui():
+    """Return the shared CodeDisplayUI controller."""
+    from ui.components.code_display import CodeDisplayUI
+    return CodeDisplayUI()
+
+@st.cache_data(show_spinner=False)
+def _tab_labels(language: str) -> List[str]:
+    """
+    Build the main tab labels once per language.
+    
+    Args:
+        language: Current UI language, used as the cache key for t()
+        
+    Returns:
+        List of translated tab labels
+    """
+    return [
+        t("tab_generate"), 
+        t("tab_review"), 
+        t("tab_feedback")
+        #t("tab_logs")
+    ]
+
+@st.cache_data(show_spinner=False)
+def _header_html(language: str) -> str:
+    """
+    Build the page header HTML once per language.
+    
+    Args:
+        language: Current UI language, used as the cache key for t()
+        
+    Returns:
+        Header HTML string
+    """
+    return f"""
+    <div style="text-align: center; margin-bottom: 20px;">
+        <h1 style="color: rgb(178 185 213); margin-bottom: 5px;">{t('app_title')}</h1>
+        <p style="font-size: 1.1rem; color: #666;">{t('app_subtitle')}</p>
+    </div>
+    """
+
 def main():
     """Enhanced main application function with provider selection."""
 
@@ -66,13 +156,13 @@ def main():
     init_language()
 
     try:
-        from db.schema_update import update_database_schema
-        update_database_schema()
+        _ensure_schema()
     except Exception as e:
         logger.error(f"Database schema update failed: {str(e)}")
 
     # Initialize the authentication UI
-    auth_ui = AuthUI()
+    auth_ui = get_auth_ui()
+    auth_ui.init_auth_state()
 
     # Check if the user is authenticated
     if not auth_ui.is_authenticated():
@@ -93,44 +183,32 @@ def main():
             for key in ["auth", "provider_selection", "user_level", "language"]
             if key in st.session_state
         }        
-        # Clear workflow-related state
-        workflow_keys = [k for k in st.session_state.keys() 
-                        if k not in preserved.keys()]
-        for key in workflow_keys:
-            del st.session_state[key]
-        
-        # Restore preserved values
+        # Clear workflow-related state and restore preserved values
+        st.session_state.clear()
         st.session_state.update(preserved)
-        st.session_state.workflow_state = WorkflowState()
+        st.session_state.workflow_state = new_workflow_state()
         st.session_state.active_tab = 0
         st.rerun()
 
     # Initialize session state
     init_session_state()
     
-    # Initialize LLM manager
-    llm_manager = LLMManager()
-    
-    if "provider_selection" not in st.session_state:
-        st.session_state.provider_selection = "groq"    
-    
+    # Read per run rather than at import: app.py is re-executed on every rerun
+    # anyway, and .env is only loaded once the db package has been imported
     api_key = os.getenv("GROQ_API_KEY", "")
     if not api_key:
-        st.error("⚠️ No Groq API key found in environment variables. Please set GROQ_API_KEY in your .env file.")
-        st.info("To get a Groq API key:")
-        st.info("1. Visit https://console.groq.com/")
-        st.info("2. Sign up and get your API key")
-        st.info("3. Add GROQ_API_KEY=your_key_here to your .env file")
+        st.error(
+            "⚠️ No Groq API key found in environment variables. Please set GROQ_API_KEY in your .env file.\n\n"
+            "**To get a Groq API key:**\n"
+            "1. Visit https://console.groq.com/\n"
+            "2. Sign up and get your API key\n"
+            "3. Add `GROQ_API_KEY=your_key_here` to your .env file"
+        )
         st.stop()
 
     # Configure provider without testing connection (will be tested on first use)
     try:
-        success = llm_manager.set_provider("groq", api_key)
-        if not success:
-            st.error("❌ Failed to configure Groq provider. Please check your configuration.")
-            st.stop()
-        else:
-            logger.debug("✅ Groq provider configured successfully")
+        llm_manager = get_llm_manager(api_key)
     except Exception as e:
         st.error(f"❌ Error configuring LLM provider: {str(e)}")
         st.stop()
@@ -142,19 +220,13 @@ def main():
     auth_ui.render_combined_profile_leaderboard()
 
     # Initialize workflow after provider is setup
-    workflow = JavaCodeReviewGraph(llm_manager)
+    workflow = get_workflow(llm_manager, st.session_state.language)
 
     # Initialize UI components
-    code_display_ui = CodeDisplayUI()
-    code_generator_ui = CodeGeneratorUI(workflow, code_display_ui)
+    code_display_ui = get_code_display_ui()
     
     # Header with improved styling
-    st.markdown(f"""
-    <div style="text-align: center; margin-bottom: 20px;">
-        <h1 style="color: rgb(178 185 213); margin-bottom: 5px;">{t('app_title')}</h1>
-        <p style="font-size: 1.1rem; color: #666;">{t('app_subtitle')}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_header_html(st.session_state.language), unsafe_allow_html=True)
     
     # Display error message if there's an error
     if st.session_state.error:
@@ -164,30 +236,26 @@ def main():
             st.rerun()
     
     # Create enhanced tabs for different steps of the workflow
-    tab_labels = [
-        t("tab_generate"), 
-        t("tab_review"), 
-        t("tab_feedback")
-        #t("tab_logs")
-    ]
+    tab_labels = _tab_labels(st.session_state.language)
     
     # Use the enhanced tabs function
-    tabs = create_enhanced_tabs(tab_labels)
-    
-    # Get user level from auth_ui
-    user_level = auth_ui.get_user_level()
+    active_tab = create_enhanced_tabs(tab_labels)
     
-    # Tab content
-    with tabs[0]:
+    # Tab content - only the active panel is rendered on each rerun
+    if active_tab == 0:
+        from ui.components.code_generator import CodeGeneratorUI
+        code_generator_ui = CodeGeneratorUI(workflow, code_display_ui)
         code_generator_ui.render(user_level)
     
-    with tabs[1]:
+    elif active_tab == 1:
+        from ui.components.code_display import render_review_tab
         render_review_tab(workflow, code_display_ui, auth_ui)
     
-    with tabs[2]:
+    elif active_tab == 2:
+        from ui.components.feedback_system import render_feedback_tab
         render_feedback_tab(workflow, auth_ui)
         
-    # with tabs[3]:  
+    # elif active_tab == 3:
     #     render_llm_logs_tab()
 
 if __name__ == "__main__":
@@ -3,37 +3,149 @@ Badge and rewards manager for the Java Peer Review Training System.
 """
 
 import logging
-import datetime
-import uuid
+import threading
+import time
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional, Tuple
 from db.mysql_connection import MySQLConnection
 from utils.language_utils import get_current_language, t
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Logging is configured by the application entry point
 logger = logging.getLogger(__name__)
 
 class BadgeManager:
     """Manager for badges, points and user progress tracking."""
     
     _instance = None
+    _instance_lock = threading.Lock()
+    
+    # Language-specific column names, looked up instead of formatted per call
+    _LANG_FIELDS = {
+        "en": {"name": "name_en", "description": "description_en",
+               "display_name": "display_name_en", "level": "level_name_en"},
+        "zh": {"name": "name_zh", "description": "description_zh",
+               "display_name": "display_name_zh", "level": "level_name_zh"}
+    }
+    
+    # Badge conditions, evaluated in SQL (see _award_badge_if)
+    _BUG_HUNTER_CONDITION = """
+        (SELECT COUNT(*) FROM activity_log
+         WHERE user_id = %s AND activity_type = 'perfect_review') >= 5
+    """
+    _PERFECTIONIST_CONDITION = """
+        (SELECT COUNT(*) FROM (
+            SELECT activity_type FROM activity_log
+            WHERE user_id = %s
+            ORDER BY created_at DESC
+            LIMIT 3
+         ) recent WHERE recent.activity_type = 'perfect_review') = 3
+    """
+    _FULL_SPECTRUM_CONDITION = """
+        (SELECT COUNT(DISTINCT category) FROM error_category_stats
+         WHERE user_id = %s AND identified > 0) >= 5
+    """
+    # Joined within 7 whole days (less than 8 days ago), matching the old Python date check
+    _RISING_STAR_CONDITION = """
+        EXISTS (SELECT 1 FROM users
+                WHERE uid = %s AND total_points >= 500
+                  AND created_at > NOW() - INTERVAL 8 DAY)
+    """
+    
+    # Users whose rising-star outcome is decided, so no further checks are needed;
+    # bounded, since forgetting a user only costs one more conditional insert
+    RISING_STAR_SETTLED_MAX = 10000
+    _rising_star_settled: "OrderedDict[str, None]" = OrderedDict()
+    _rising_star_lock = threading.Lock()
+    # Users whose rising-star check is running on the current thread
+    _rising_star_checking = threading.local()
+    
+    # Category to badge ID mappings, keyed by language
+    _category_badges_cache: Dict[str, Dict[str, str]] = {}
+    
+    # The badges table is small, static configuration, so it is kept in memory
+    BADGES_CACHE_TTL = 300  # seconds
+    _DIFFICULTY_RANK = {"hard": 3, "medium": 2, "easy": 1}
+    _badges_cache: Dict[str, Dict[str, Any]] = {}
+    _badges_loaded_at: float = 0.0
+    
+    # Badge IDs each user holds, as (loaded_at, badge_ids); badges are never revoked,
+    # so a stale entry can only cause a redundant award attempt
+    HELD_BADGES_TTL = 60  # seconds
+    _held_badges_cache: Dict[str, Tuple[float, set]] = {}
+    
+    # Leaderboard rows; both language columns are selected and picked by _localize.
+    # The scored query is only used by get_leaderboard_with_badges, which counts
+    # badges from the user_badges rows it already loads
+    _LEADERBOARD_QUERY = """
+        SELECT uid, display_name_en, display_name_zh, total_points, level_name_en, level_name_zh,
+            (SELECT COUNT(*) FROM user_badges WHERE user_id = uid) AS badge_count
+        FROM users
+        ORDER BY total_points DESC
+        LIMIT %s
+    """
+    _LEADERBOARD_SCORED_QUERY = """
+        SELECT uid, display_name_en, display_name_zh, total_points, level_name_en, level_name_zh
+        FROM users
+        WHERE total_points > 0
+        ORDER BY total_points DESC
+        LIMIT %s
+    """
+    
+    # Review count needed for each review progression badge
+    _REVIEW_TIER_BADGES = ((5, "reviewer-novice"), (25, "reviewer-adept"), (50, "reviewer-master"))
     
     def __new__(cls):
         """Ensure singleton instance."""
+        # Double-checked locking: the lock is only taken until the instance exists
         if cls._instance is None:
-            cls._instance = super(BadgeManager, cls).__new__(cls)
-            cls._instance._initialized = False
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(BadgeManager, cls).__new__(cls)
+                    instance.db = MySQLConnection()
+                    cls._instance = instance
         return cls._instance
     
     def __init__(self):
-        """Initialize the BadgeManager."""
-        if self._initialized:
-            return
+        """Initialize the BadgeManager (state is set up once in __new__)."""
+    
+    def _language_fields(self, language: str) -> Dict[str, str]:
+        """
+        Get the language-specific column names.
+        
+        The language is passed in rather than stored on the shared singleton,
+        so concurrent sessions in different languages do not interfere.
+        
+        Args:
+            language: Language code
+            
+        Returns:
+            Dictionary mapping field kinds to language-specific column names
+        """
+        return self._LANG_FIELDS.get(language, self._LANG_FIELDS["en"])
+    
+    def _localize(self, row: Dict[str, Any], language: str, *kinds: str) -> Dict[str, Any]:
+        """
+        Pick the language-specific values out of a row that selected every language column.
+        
+        Queries select both language columns so the SQL text stays constant;
+        the column for the requested language is chosen here from the
+        _LANG_FIELDS whitelist instead of being formatted into the query.
+        
+        Args:
+            row: Result row containing the per-language columns
+            language: Language code
+            *kinds: Field kinds to localize (e.g. "name", "description")
             
-        self.db = MySQLConnection()
-        self._initialized = True
-        # Get current language on initialization and update when needed
-        self.current_language = get_current_language()
+        Returns:
+            The same row with each kind set and the per-language columns removed
+        """
+        fields = self._language_fields(language)
+        for kind in kinds:
+            value = row.get(fields[kind])
+            for lang_fields in self._LANG_FIELDS.values():
+                row.pop(lang_fields[kind], None)
+            row[kind] = value
+        return row
     
     def award_points(self, user_id: str, points: int, activity_type: str, details: str = None) -> Dict[str, Any]:
         """
@@ -51,9 +163,6 @@ class BadgeManager:
         if not user_id:
             return {"success": False, "error": t("invalid_user_id")}
         
-        # Update current language whenever a method is called
-        self.current_language = get_current_language()
-        
         try:
             # First, update the user's total points
             update_query = """
@@ -62,19 +171,19 @@ class BadgeManager:
                 WHERE uid = %s
             """
             
-            self.db.execute_query(update_query, (points, user_id))
+            self.db.execute_prepared(update_query, (points, user_id))
            
             log_query = """
                     INSERT INTO activity_log 
                     (user_id, activity_type, points, details_en, details_zh) 
                     VALUES (%s, %s, %s, %s, %s)
                 """
-            self.db.execute_query(log_query, (user_id, activity_type, points, details, details))
+            self.db.execute_prepared(log_query, (user_id, activity_type, points, details, details))
          
             
             # Get the updated total points
             points_query = "SELECT total_points FROM users WHERE uid = %s"
-            result = self.db.execute_query(points_query, (user_id,), fetch_one=True)
+            result = self.db.execute_prepared(points_query, (user_id,), fetch_one=True)
             
             if result:
                 total_points = result.get("total_points", 0)
@@ -87,7 +196,57 @@ class BadgeManager:
                 return {"success": False, "error": t("user_not_found")}
                 
         except Exception as e:
-            logger.error(f"{t('error_awarding_points')}: {str(e)}")
+            logger.error("%s: %s", t('error_awarding_points'), e)
+            return {"success": False, "error": str(e)}
+    
+    def award_points_bulk(self, user_id: str, awards: List[Tuple[int, str, Optional[str]]]) -> Dict[str, Any]:
+        """
+        Award several point entries to a user with one update and one multi-row log insert.
+        
+        Args:
+            user_id: The user's ID
+            awards: List of (points, activity_type, details) tuples
+            
+        Returns:
+            Dict containing success status and updated point total
+        """
+        if not user_id:
+            return {"success": False, "error": t("invalid_user_id")}
+        if not awards:
+            return {"success": True, "total_points": None}
+        
+        try:
+            update_query = """
+                UPDATE users 
+                SET total_points = total_points + %s 
+                WHERE uid = %s
+            """
+            self.db.execute_prepared(update_query, (sum(points for points, _, _ in awards), user_id))
+            
+            # One INSERT ... VALUES (...),(...) for the whole batch
+            placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(awards))
+            log_query = f"""
+                INSERT INTO activity_log 
+                (user_id, activity_type, points, details_en, details_zh) 
+                VALUES {placeholders}
+            """
+            params = []
+            for points, activity_type, details in awards:
+                params.extend((user_id, activity_type, points, details, details))
+            self.db.execute_query(log_query, tuple(params))
+            
+            points_query = "SELECT total_points FROM users WHERE uid = %s"
+            result = self.db.execute_prepared(points_query, (user_id,), fetch_one=True)
+            
+            if result:
+                total_points = result.get("total_points", 0)
+                self._check_point_badges(user_id, total_points)
+                return {"success": True, "total_points": total_points}
+            else:
+                return {"success": False, "error": t("user_not_found")}
+                
+        except Exception as e:
+            logger.error("%s: %s", t('error_awarding_points'), e)
             return {"success": False, "error": str(e)}
     
     def award_badge(self, user_id: str, badge_id: str) -> Dict[str, Any]:
@@ -104,49 +263,34 @@ class BadgeManager:
         if not user_id or not badge_id:
             return {"success": False, "error": t("invalid_user_id_or_badge_id")}
         
-        # Update current language
-        self.current_language = get_current_language()
+        language = get_current_language()
         
         try:
-            # Check if the badge exists
-            # Use language-specific field based on current language
-            name_field = f"name_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "name_en"
-            desc_field = f"description_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "description_en"
-            
-            badge_query = f"SELECT badge_id, {name_field} as name, {desc_field} as description, points FROM badges WHERE badge_id = %s"
-            badge = self.db.execute_query(badge_query, (badge_id,), fetch_one=True)
+            # Badge lookup, award, points and activity log in one round trip
+            rows = self.db.call_procedure(
+                "sp_award_badge",
+                (user_id, badge_id, language, t('earned_badge'))
+            )
+            if rows is None:
+                return self._award_badge_with_queries(user_id, badge_id, language)
             
-            if not badge:
+            if not rows:
                 return {"success": False, "error": t("badge_not_found")}
             
-            # Check if the user already has this badge
-            has_badge_query = """
-                SELECT * FROM user_badges 
-                WHERE user_id = %s AND badge_id = %s
-            """
-            
-            existing = self.db.execute_query(has_badge_query, (user_id, badge_id), fetch_one=True)
+            row = rows[0]
+            self._remember_held_badge(user_id, badge_id)
+            badge = {
+                "badge_id": row.get("badge_id"),
+                "name": row.get("name"),
+                "description": row.get("description"),
+                "points": row.get("points")
+            }
             
-            if existing:
+            if not row.get("newly_awarded"):
                 return {"success": True, "badge": badge, "message": t("badge_already_awarded")}
             
-            # Award the badge
-            award_query = """
-                INSERT INTO user_badges 
-                (user_id, badge_id) 
-                VALUES (%s, %s)
-            """
-            
-            self.db.execute_query(award_query, (user_id, badge_id))
-            
-            # Award points for earning the badge
-            badge_points = badge.get("points", 10)
-            self.award_points(
-                user_id, 
-                badge_points,
-                "badge_earned",
-                f"{t('earned_badge')}: {badge.get('name')}"
-            )
+            # Badge points may unlock point-based badges
+            self._check_point_badges(user_id, row.get("total_points") or 0)
             
             return {
                 "success": True, 
@@ -155,9 +299,165 @@ class BadgeManager:
             }
                 
         except Exception as e:
-            logger.error(f"{t('error_awarding_badge')}: {str(e)}")
+            logger.error("%s: %s", t('error_awarding_badge'), e)
             return {"success": False, "error": str(e)}
     
+    def _award_badge_with_queries(self, user_id: str, badge_id: str, language: str) -> Dict[str, Any]:
+        """
+        Award a badge with individual queries when sp_award_badge is unavailable.
+        
+        Args:
+            user_id: The user's ID
+            badge_id: The badge ID to award
+            language: Language for the badge name and description
+            
+        Returns:
+            Dict containing success status and badge information
+        """
+        badge = self._get_badge(badge_id, language)
+        
+        if not badge:
+            return {"success": False, "error": t("badge_not_found")}
+        
+        # The unique (user_id, badge_id) key makes this a no-op for held badges
+        award_query = """
+            INSERT IGNORE INTO user_badges 
+            (user_id, badge_id) 
+            VALUES (%s, %s)
+        """
+        
+        newly_awarded = self.db.execute_prepared(award_query, (user_id, badge_id))
+        self._remember_held_badge(user_id, badge_id)
+        if not newly_awarded:
+            return {"success": True, "badge": badge, "message": t("badge_already_awarded")}
+        
+        self._award_badge_points(user_id, badge)
+        
+        return {
+            "success": True, 
+            "badge": badge,
+            "message": t("badge_awarded_successfully").format(badge_name=badge.get('name'))
+        }
+    
+    def get_held_badge_ids(self, user_id: str) -> set:
+        """
+        Get the IDs of the badges a user holds, cached for HELD_BADGES_TTL seconds.
+        
+        Args:
+            user_id: The user's ID
+            
+        Returns:
+            Set of badge IDs
+        """
+        now = time.monotonic()
+        cached = self._held_badges_cache.get(user_id)
+        if cached and now - cached[0] <= self.HELD_BADGES_TTL:
+            return cached[1]
+        
+        rows = self.db.execute_prepared("SELECT badge_id FROM user_badges WHERE user_id = %s", (user_id,))
+        if rows is None:
+            return set()
+        held = {row["badge_id"] for row in rows}
+        self._held_badges_cache[user_id] = (now, held)
+        return held
+    
+    def _remember_held_badge(self, user_id: str, badge_id: str) -> None:
+        """
+        Record a badge in the held-badge cache if the user has an entry.
+        
+        Args:
+            user_id: The user's ID
+            badge_id: The badge ID now held
+        """
+        cached = self._held_badges_cache.get(user_id)
+        if cached:
+            cached[1].add(badge_id)
+    
+    def _get_all_badges(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get every badge definition, reloading the table once the cache TTL has passed.
+        
+        Returns:
+            Dictionary mapping badge IDs to badge rows with all language columns
+        """
+        now = time.monotonic()
+        if not BadgeManager._badges_cache or now - BadgeManager._badges_loaded_at > self.BADGES_CACHE_TTL:
+            rows = self.db.execute_query("""
+                SELECT badge_id, name_en, name_zh, description_en, description_zh,
+                       icon, category, difficulty, points
+                FROM badges
+            """)
+            if rows:
+                # Swap in a new dict so concurrent readers never see a partial table
+                BadgeManager._badges_cache = {row["badge_id"]: row for row in rows}
+                BadgeManager._badges_loaded_at = now
+        return BadgeManager._badges_cache
+    
+    def _get_badge(self, badge_id: str, language: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a badge's details in the given language.
+        
+        Args:
+            badge_id: The badge ID
+            language: Language for the badge name and description
+            
+        Returns:
+            Badge dictionary or None if the badge does not exist
+        """
+        badge = self._get_all_badges().get(badge_id)
+        if not badge:
+            return None
+        return self._localize(dict(badge), language, "name", "description")
+    
+    def _award_badge_points(self, user_id: str, badge: Dict[str, Any]) -> None:
+        """
+        Award the points for a badge that was just inserted into user_badges.
+        
+        Args:
+            user_id: The user's ID
+            badge: Badge dictionary from _get_badge
+        """
+        # Award points for earning the badge
+        badge_points = badge.get("points", 10)
+        self.award_points(
+            user_id, 
+            badge_points,
+            "badge_earned",
+            f"{t('earned_badge')}: {badge.get('name')}"
+        )
+    
+    def _award_badge_if(self, user_id: str, badge_id: str, condition_sql: str, params: tuple = ()) -> Optional[bool]:
+        """
+        Award a badge only if an SQL condition holds, checked and inserted in one statement.
+        
+        Args:
+            user_id: The user's ID
+            badge_id: The badge ID to award
+            condition_sql: Boolean SQL expression with %s placeholders
+            params: Parameters for condition_sql
+            
+        Returns:
+            True if the badge was newly awarded, False if the condition did not hold
+            or the badge was already held, None if the query failed
+        """
+        award_query = f"""
+            INSERT IGNORE INTO user_badges (user_id, badge_id)
+            SELECT %s, %s FROM DUAL
+            WHERE {condition_sql}
+        """
+        
+        affected_rows = self.db.execute_query(award_query, (user_id, badge_id) + tuple(params))
+        if affected_rows is None:
+            return None
+        if not affected_rows:
+            return False
+        
+        self._remember_held_badge(user_id, badge_id)
+        badge = self._get_badge(badge_id, get_current_language())
+        if badge:
+            self._award_badge_points(user_id, badge)
+        return True
+    
     def get_user_badges(self, user_id: str) -> List[Dict[str, Any]]:
         """
         Get all badges earned by a user.
@@ -171,16 +471,11 @@ class BadgeManager:
         if not user_id:
             return []
         
-        # Update current language
-        self.current_language = get_current_language()
+        language = get_current_language()
         
         try:
-            # Use language-specific field based on current language
-            name_field = f"name_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "name_en"
-            desc_field = f"description_{self.current_language}" if self.current_language == "en" or self.current_language == "zh" else "description_en"
-            
-            query = f"""
-                SELECT b.badge_id, b.{name_field} as name, b.{desc_field} as description, 
+            query = """
+                SELECT b.badge_id, b.name_en, b.name_zh, b.description_en, b.description_zh,
                        b.icon, b.category, b.difficulty, b.points, ub.awarded_at
                 FROM badges b
                 JOIN user_badges ub ON b.badge_id = ub.badge_id
@@ -189,10 +484,10 @@ class BadgeManager:
             """
             
             badges = self.db.execute_query(query, (user_id,))
-            return badges or []
+            return [self._localize(badge, language, "name", "description") for badge in badges or []]
                 
         except Exception as e:
-            logger.error(f"{t('error_getting_user_badges')}: {str(e)}")
+            logger.error("%s: %s", t('error_getting_user_badges'), e)
             return []
     
     def update_category_stats(self, user_id: str, category: str, 
@@ -213,41 +508,23 @@ class BadgeManager:
             return {"success": False, "error": t("invalid_user_id_or_category")}
         
         try:
-            # Check if the stats exist
-            check_query = """
-                SELECT * FROM error_category_stats 
-                WHERE user_id = %s AND category = %s
+            # Insert or increment the stats in one statement; assignments run left
+            # to right, so mastery_level sees the updated counts
+            upsert_query = """
+                INSERT INTO error_category_stats 
+                (user_id, category, encountered, identified, mastery_level) 
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    encountered = encountered + VALUES(encountered),
+                    identified = identified + VALUES(identified),
+                    mastery_level = CASE 
+                        WHEN encountered > 0 THEN identified / encountered 
+                        ELSE 0 
+                    END
             """
             
-            stats = self.db.execute_query(check_query, (user_id, category), fetch_one=True)
-            
-            if stats:
-                # Update existing stats
-                update_query = """
-                    UPDATE error_category_stats 
-                    SET encountered = encountered + %s,
-                        identified = identified + %s,
-                        mastery_level = CASE 
-                            WHEN (encountered + %s) > 0 THEN (identified + %s) / (encountered + %s) 
-                            ELSE 0 
-                        END
-                    WHERE user_id = %s AND category = %s
-                """
-                
-                self.db.execute_query(
-                    update_query, 
-                    (encountered, identified, encountered, identified, encountered, user_id, category)
-                )
-            else:
-                # Insert new stats
-                insert_query = """
-                    INSERT INTO error_category_stats 
-                    (user_id, category, encountered, identified, mastery_level) 
-                    VALUES (%s, %s, %s, %s, %s)
-                """
-                
-                mastery = identified / encountered if encountered > 0 else 0
-                self.db.execute_query(insert_query, (user_id, category, encountered, identified, mastery))
+            mastery = identified / encountered if encountered > 0 else 0
+            self.db.execute_query(upsert_query, (user_id, category, encountered, identified, mastery))
             
             # Get the updated stats
             updated_query = """
@@ -263,7 +540,62 @@ class BadgeManager:
             return {"success": True, "stats": updated_stats}
                 
         except Exception as e:
-            logger.error(f"{t('error_updating_category_stats')}: {str(e)}")
+            logger.error("%s: %s", t('error_updating_category_stats'), e)
+            return {"success": False, "error": str(e)}
+    
+    def update_category_stats_bulk(self, user_id: str,
+                                   stats: List[Tuple[str, int, int]]) -> Dict[str, Any]:
+        """
+        Update several error category statistics with one multi-row upsert.
+        
+        Args:
+            user_id: The user's ID
+            stats: List of (category, encountered, identified) tuples
+            
+        Returns:
+            Dict containing success status and the updated statistics rows
+        """
+        if not user_id:
+            return {"success": False, "error": t("invalid_user_id_or_category")}
+        stats = [row for row in stats if row[0]]
+        if not stats:
+            return {"success": True, "stats": []}
+        
+        try:
+            placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(stats))
+            upsert_query = f"""
+                INSERT INTO error_category_stats 
+                (user_id, category, encountered, identified, mastery_level) 
+                VALUES {placeholders}
+                ON DUPLICATE KEY UPDATE
+                    encountered = encountered + VALUES(encountered),
+                    identified = identified + VALUES(identified),
+                    mastery_level = CASE 
+                        WHEN encountered > 0 THEN identified / encountered 
+                        ELSE 0 
+                    END
+            """
+            params = []
+            for category, encountered, identified in stats:
+                mastery = identified / encountered if encountered > 0 else 0
+                params.extend((user_id, category, encountered, identified, mastery))
+            self.db.execute_query(upsert_query, tuple(params))
+            
+            categories = [category for category, _, _ in stats]
+            updated_query = f"""
+                SELECT * FROM error_category_stats 
+                WHERE user_id = %s AND category IN ({", ".join(["%s"] * len(categories))})
+            """
+            updated_stats = self.db.execute_query(updated_query, (user_id, *categories)) or []
+            
+            for row in updated_stats:
+                self._check_category_mastery(user_id, row["category"], row, check_full_spectrum=False)
+            self._award_badge_if(user_id, "full-spectrum", self._FULL_SPECTRUM_CONDITION, (user_id,))
+            
+            return {"success": True, "stats": updated_stats}
+                
+        except Exception as e:
+            logger.error("%s: %s", t('error_updating_category_stats'), e)
             return {"success": False, "error": str(e)}
     
     def get_category_stats(self, user_id: str) -> List[Dict[str, Any]]:
@@ -290,7 +622,7 @@ class BadgeManager:
             return stats or []
                 
         except Exception as e:
-            logger.error(f"{t('error_getting_category_stats')}: {str(e)}")
+            logger.error("%s: %s", t('error_getting_category_stats'), e)
             return []
     
     def update_consecutive_days(self, user_id: str) -> Dict[str, Any]:
@@ -307,47 +639,29 @@ class BadgeManager:
             return {"success": False, "error": t("invalid_user_id")}
         
         try:
-            # Get current last_activity and consecutive_days
-            query = """
-                SELECT last_activity, consecutive_days 
-                FROM users 
+            # Compute the streak inside one UPDATE so concurrent activity cannot
+            # double count or lose a day. Assignments run left to right, so
+            # consecutive_days must be set while last_activity is still the old value.
+            update_query = """
+                UPDATE users 
+                SET consecutive_days = CASE
+                        WHEN last_activity = CURDATE() THEN consecutive_days
+                        WHEN last_activity = CURDATE() - INTERVAL 1 DAY THEN consecutive_days + 1
+                        ELSE 1
+                    END,
+                    last_activity = CURDATE()
                 WHERE uid = %s
             """
             
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
+            self.db.execute_prepared(update_query, (user_id,))
+            
+            query = "SELECT consecutive_days FROM users WHERE uid = %s"
+            result = self.db.execute_prepared(query, (user_id,), fetch_one=True)
             
             if not result:
                 return {"success": False, "error": t("user_not_found")}
             
-            today = datetime.date.today()
-            last_activity = result.get("last_activity")
-            consecutive_days = result.get("consecutive_days", 0)
-            
-            # Calculate new consecutive days
-            new_consecutive_days = consecutive_days
-            
-            if not last_activity:
-                # First activity
-                new_consecutive_days = 1
-            elif last_activity == today:
-                # Already logged today, no change
-                pass
-            elif last_activity == today - datetime.timedelta(days=1):
-                # Activity on consecutive day
-                new_consecutive_days += 1
-            else:
-                # Break in streak
-                new_consecutive_days = 1
-            
-            # Update user record
-            update_query = """
-                UPDATE users 
-                SET last_activity = %s,
-                    consecutive_days = %s
-                WHERE uid = %s
-            """
-            
-            self.db.execute_query(update_query, (today, new_consecutive_days, user_id))
+            new_consecutive_days = result.get("consecutive_days", 0)
             
             # Check for consistency badges
             if new_consecutive_days >= 5:
@@ -359,9 +673,31 @@ class BadgeManager:
             }
                 
         except Exception as e:
-            logger.error(f"{t('error_updating_consecutive_days')}: {str(e)}")
+            logger.error("%s: %s", t('error_updating_consecutive_days'), e)
             return {"success": False, "error": str(e)}
     
+    def _leaderboard_base(self, limit: int, only_scored: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get the top users by total points with localized fields and rank.
+        
+        Args:
+            limit: Maximum number of users to return
+            only_scored: Leave out users with no points; these rows carry no
+                badge_count, which the caller fills in from its own badge rows
+            
+        Returns:
+            List of user dictionaries ordered by rank
+        """
+        query = self._LEADERBOARD_SCORED_QUERY if only_scored else self._LEADERBOARD_QUERY
+        leaders = self.db.execute_query(query, (limit,)) or []
+        
+        language = get_current_language()
+        for i, leader in enumerate(leaders, 1):
+            self._localize(leader, language, "display_name", "level")
+            leader["rank"] = i
+        
+        return leaders
+    
     def get_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Get the user leaderboard by total points with multilingual support.
@@ -373,33 +709,10 @@ class BadgeManager:
             List of user dictionaries with score and ranking
         """
         try:
-            # Update current language
-            self.current_language = get_current_language()
-            
-            # Set display name and level fields based on language
-            display_name_field = f"display_name_{self.current_language}" if self.current_language in ["en", "zh"] else "display_name_en"
-            level_field = f"level_name_{self.current_language}" if self.current_language in ["en", "zh"] else "level_name_en"
-            
-            
-            # Build query with appropriate fields
-            query = f"""
-                SELECT uid, {display_name_field} as display_name, total_points, {level_field} as level,
-                    (SELECT COUNT(*) FROM user_badges WHERE user_id = uid) AS badge_count
-                FROM users
-                ORDER BY total_points DESC
-                LIMIT %s
-            """
-            
-            leaders = self.db.execute_query(query, (limit,))
-            
-            # Add rank
-            for i, leader in enumerate(leaders, 1):
-                leader["rank"] = i
-                    
-            return leaders or []
+            return self._leaderboard_base(limit)
                 
         except Exception as e:
-            logger.error(f"{t('error_getting_leaderboard')}: {str(e)}")
+            logger.error("%s: %s", t('error_getting_leaderboard'), e)
             return []
     
     def get_user_rank(self, user_id: str) -> Dict[str, Any]:
@@ -416,35 +729,27 @@ class BadgeManager:
             return {"rank": 0, "total_users": 0}
         
         try:
-            # Get the user's points
-            points_query = "SELECT total_points FROM users WHERE uid = %s"
-            result = self.db.execute_query(points_query, (user_id,), fetch_one=True)
-            
-            if not result:
-                return {"rank": 0, "total_users": 0}
-            
-            points = result.get("total_points", 0)
-            
-            # Get the user's rank
+            # Points, rank and user count in a single round trip
             rank_query = """
-                SELECT COUNT(*) AS rank_pos
-                FROM users
-                WHERE total_points > %s
+                SELECT u.total_points,
+                    (SELECT COUNT(*) FROM users WHERE total_points > u.total_points) + 1 AS rank_pos,
+                    (SELECT COUNT(*) FROM users) AS total_users
+                FROM users u
+                WHERE u.uid = %s
             """
             
-            rank_result = self.db.execute_query(rank_query, (points,), fetch_one=True)
+            result = self.db.execute_query(rank_query, (user_id,), fetch_one=True)
             
-            # Get total users
-            total_query = "SELECT COUNT(*) AS total FROM users"
-            total_result = self.db.execute_query(total_query, fetch_one=True)
+            if not result:
+                return {"rank": 0, "total_users": 0}
             
             return {
-                "rank": rank_result.get("rank_pos", 0) + 1,
-                "total_users": total_result.get("total", 0)
+                "rank": result.get("rank_pos", 1),
+                "total_users": result.get("total_users", 0)
             }
                 
         except Exception as e:
-            logger.error(f"{t('error_getting_user_rank')}: {str(e)}")
+            logger.error("%s: %s", t('error_getting_user_rank'), e)
             return {"rank": 0, "total_users": 0}
     
     def _check_point_badges(self, user_id: str, total_points: int) -> None:
@@ -456,35 +761,43 @@ class BadgeManager:
             total_points: The user's total points
         """
         # Rising Star badge - 500 points in first week
-        if total_points >= 500:
-            # Check when the user joined
-            query = "SELECT created_at FROM users WHERE uid = %s"
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
-            
-            if result:
-                created_at = result.get("created_at")
-                now = datetime.datetime.now()
-                
-                if created_at and (now - created_at).days <= 7:
-                    self.award_badge(user_id, "rising-star")
+        if total_points < 500 or user_id in self._rising_star_settled:
+            return
+        
+        # The badge's own point award comes back here on the same thread
+        checking = self._rising_star_checking.__dict__.setdefault("users", set())
+        if user_id in checking:
+            return
+        checking.add(user_id)
+        try:
+            awarded = self._award_badge_if(user_id, "rising-star", self._RISING_STAR_CONDITION, (user_id,))
+        finally:
+            checking.discard(user_id)
+        
+        # Past 500 points the outcome is final once the condition has been
+        # evaluated: either the badge is held now or the first week is over.
+        # A failed query leaves the user unsettled so the next award retries.
+        if awarded is None:
+            return
+        with self._rising_star_lock:
+            self._rising_star_settled[user_id] = None
+            if len(self._rising_star_settled) > self.RISING_STAR_SETTLED_MAX:
+                self._rising_star_settled.popitem(last=False)
     
-    def _check_category_mastery(self, user_id: str, category: str, stats: Dict[str, Any]) -> None:
+    def _get_category_badges(self, language: str) -> Dict[str, str]:
         """
-        Check if a user qualifies for category mastery badges.
+        Get the category to badge ID mapping for a language.
         
-        Args:
-            user_id: The user's ID
-            category: The error category
-            stats: Category statistics
-        """
-        # Required mastery level and minimum encounters to earn the badge
-        MASTERY_THRESHOLD = 0.85
-        MIN_ENCOUNTERS = 10
+        Built once per language and reused, since it needs several t() lookups.
         
-        if stats and stats.get("mastery_level", 0) >= MASTERY_THRESHOLD and stats.get("encountered", 0) >= MIN_ENCOUNTERS:
-            # Update current language before mapping categories
-            self.current_language = get_current_language()
+        Args:
+            language: Current UI language, which t() resolves against
             
+        Returns:
+            Dictionary mapping category names to badge IDs
+        """
+        category_badges = self._category_badges_cache.get(language)
+        if category_badges is None:
             # Map categories to badge IDs - support both English and Chinese categories
             # Categories are not translated with t() because they need to match exactly what's in the database
             category_badges = {
@@ -504,23 +817,33 @@ class BadgeManager:
                 "Java Specific": "java-maven",
                 "Java 特定錯誤": "java-maven"  # Chinese equivalent
             }
-            
+            self._category_badges_cache[language] = category_badges
+        return category_badges
+    
+    def _check_category_mastery(self, user_id: str, category: str, stats: Dict[str, Any],
+                                check_full_spectrum: bool = True) -> None:
+        """
+        Check if a user qualifies for category mastery badges.
+        
+        Args:
+            user_id: The user's ID
+            category: The error category
+            stats: Category statistics
+            check_full_spectrum: Also check the Full Spectrum badge
+        """
+        # Required mastery level and minimum encounters to earn the badge
+        MASTERY_THRESHOLD = 0.85
+        MIN_ENCOUNTERS = 10
+        
+        if stats and stats.get("mastery_level", 0) >= MASTERY_THRESHOLD and stats.get("encountered", 0) >= MIN_ENCOUNTERS:
             # Award the appropriate badge if available
-            badge_id = category_badges.get(category)
+            badge_id = self._get_category_badges(get_current_language()).get(category)
             if badge_id:
                 self.award_badge(user_id, badge_id)
             
         # Check for "Full Spectrum" badge - at least one error in each category
-        query = """
-            SELECT COUNT(DISTINCT category) AS category_count
-            FROM error_category_stats
-            WHERE user_id = %s AND identified > 0
-        """
-        
-        result = self.db.execute_query(query, (user_id,), fetch_one=True)
-        
-        if result and result.get("category_count", 0) >= 5:  # Assuming 5 main categories
-            self.award_badge(user_id, "full-spectrum")
+        if check_full_spectrum:
+            self._award_badge_if(user_id, "full-spectrum", self._FULL_SPECTRUM_CONDITION, (user_id,))
     
     def check_review_completion_badges(self, user_id: str, reviews_completed: int, 
                                     all_errors_found: bool) -> None:
@@ -532,50 +855,41 @@ class BadgeManager:
             reviews_completed: Number of reviews completed
             all_errors_found: Whether all errors were found in the review
         """
-        # Review progression badges
-        if reviews_completed >= 5:
-            self.award_badge(user_id, "reviewer-novice")
+        # Review progression badges, skipping the ones already held
+        earned_tiers = [badge_id for threshold, badge_id in self._REVIEW_TIER_BADGES
+                        if reviews_completed >= threshold]
+        if earned_tiers:
+            held = self.get_held_badge_ids(user_id)
+            for badge_id in earned_tiers:
+                if badge_id not in held:
+                    self.award_badge(user_id, badge_id)
         
-        if reviews_completed >= 25:
-            self.award_badge(user_id, "reviewer-adept")
-        
-        if reviews_completed >= 50:
-            self.award_badge(user_id, "reviewer-master")
-        
-        # Bug Hunter badge - find all errors in at least 5 reviews
         if all_errors_found:
-            # Count how many perfect reviews the user has
-            query = """
-                SELECT COUNT(*) AS perfect_count
-                FROM activity_log
-                WHERE user_id = %s AND activity_type = 'perfect_review'
-            """
-            
-            result = self.db.execute_query(query, (user_id,), fetch_one=True)
-            
-            if result and result.get("perfect_count", 0) >= 5:
-                self.award_badge(user_id, "bug-hunter")            
-          
-                self.db.execute_query(
-                    "INSERT INTO activity_log (user_id, activity_type, points, details_en, details_zh) VALUES (%s, %s, %s, %s, %s)",
-                    (user_id, "perfect_review", 0, t("completed_perfect_review"), t("completed_perfect_review"))
-                )
-          
-            
-            # Perfectionist badge - 3 consecutive perfect reviews
-            query = """
-                SELECT activity_type
-                FROM activity_log
-                WHERE user_id = %s
-                ORDER BY created_at DESC
-                LIMIT 3
-            """
+            # Log the perfect review first so both checks below count it
+            self.db.execute_prepared(
+                """
+                INSERT INTO activity_log (user_id, activity_type, points, details_en, details_zh)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                (user_id, "perfect_review", 0, t("completed_perfect_review"), t("completed_perfect_review"))
+            )
             
-            result = self.db.execute_query(query, (user_id,))
+            # Bug Hunter (all errors found in at least 5 reviews) and Perfectionist
+            # (3 consecutive perfect reviews) evaluated in one query
+            result = self.db.execute_query(
+                f"""
+                SELECT {self._BUG_HUNTER_CONDITION} AS bug_hunter,
+                       {self._PERFECTIONIST_CONDITION} AS perfectionist
+                """,
+                (user_id, user_id),
+                fetch_one=True
+            )
             
-            if result and len(result) >= 3:
-                all_perfect = all(r.get("activity_type") == "perfect_review" for r in result)
-                if all_perfect:
+            if result:
+                held = self.get_held_badge_ids(user_id)
+                if result.get("bug_hunter") and "bug-hunter" not in held:
+                    self.award_badge(user_id, "bug-hunter")
+                if result.get("perfectionist") and "perfectionist" not in held:
                     self.award_badge(user_id, "perfectionist")
 
     def get_leaderboard_with_badges(self, limit: int = 10) -> List[Dict[str, Any]]:
@@ -589,55 +903,52 @@ class BadgeManager:
             List of user dictionaries with badge icons and ranking
         """
         try:
-            # Update current language
-            self.current_language = get_current_language()
-            
-            # Set display name and level fields based on language
-            display_name_field = f"display_name_{self.current_language}" if self.current_language in ["en", "zh"] else "display_name_en"
-            level_field = f"level_name_{self.current_language}" if self.current_language in ["en", "zh"] else "level_name_en"
-            
-            # Build query with appropriate fields
-            query = f"""
-                SELECT uid, {display_name_field} as display_name, total_points, {level_field} as level,
-                    (SELECT COUNT(*) FROM user_badges WHERE user_id = uid) AS badge_count
-                FROM users
-                WHERE total_points > 0
-                ORDER BY total_points DESC
-                LIMIT %s
-            """
-            
-            leaders = self.db.execute_query(query, (limit,))
+            leaders = self._leaderboard_base(limit, only_scored=True)
             
             if not leaders:
                 return []
             
-            # Add rank and get top badges for each user
-            for i, leader in enumerate(leaders, 1):
-                leader["rank"] = i
-                
-                # Get top 3 badges for this user
-                badge_query = f"""
-                    SELECT b.icon, b.{f"name_{self.current_language}" if self.current_language in ["en", "zh"] else "name_en"} as name,
-                        b.category, b.difficulty
-                    FROM badges b
-                    JOIN user_badges ub ON b.badge_id = ub.badge_id
-                    WHERE ub.user_id = %s
-                    ORDER BY 
-                        CASE b.difficulty 
-                            WHEN 'hard' THEN 3 
-                            WHEN 'medium' THEN 2 
-                            WHEN 'easy' THEN 1 
-                            ELSE 0 
-                        END DESC,
-                        ub.awarded_at DESC
-                    LIMIT 3
-                """
-                
-                badges = self.db.execute_query(badge_query, (leader["uid"],))
-                leader["top_badges"] = badges or []
+            # Badge IDs for every leader in one query; badge details come from the in-memory table
+            uids = [leader["uid"] for leader in leaders]
+            badge_query = f"""
+                SELECT user_id, badge_id FROM user_badges
+                WHERE user_id IN ({", ".join(["%s"] * len(uids))})
+                ORDER BY awarded_at DESC
+            """
+            rows = self.db.execute_query(badge_query, tuple(uids)) or []
+            
+            badges = self._get_all_badges()
+            leaders_by_uid = {leader["uid"]: leader for leader in leaders}
+            for leader in leaders:
+                leader["top_badges"] = []
+                leader["badge_count"] = 0
+            for row in rows:
+                leaders_by_uid[row["user_id"]]["badge_count"] += 1
+                badge = badges.get(row["badge_id"])
+                if badge:
+                    leaders_by_uid[row["user_id"]]["top_badges"].append(badge)
+            
+            name_field = self._language_fields(get_current_language())["name"]
+            
+            # Keep the 3 hardest badges; the sort is stable, so ties stay newest first
+            for leader in leaders:
+                top_badges = sorted(
+                    leader["top_badges"],
+                    key=lambda badge: self._DIFFICULTY_RANK.get(badge["difficulty"], 0),
+                    reverse=True
+                )[:3]
+                leader["top_badges"] = [
+                    {
+                        "icon": badge["icon"],
+                        "name": badge[name_field],
+                        "category": badge["category"],
+                        "difficulty": badge["difficulty"]
+                    }
+                    for badge in top_badges
+                ]
                     
             return leaders
                 
         except Exception as e:
-            logger.error(f"{t('error_getting_leaderboard')}: {str(e)}")
+            logger.error("%s: %s", t('error_getting_leaderboard'), e)
             return []
\ No newline at end of file
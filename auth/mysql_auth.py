@@ -6,11 +6,15 @@ MySQL-based authentication for Java Peer Review Training System.
 import logging
 import datetime
 import hashlib
+import hmac
+import threading
+import time
 import uuid
-from typing import Dict, Any, List, Optional
+import bcrypt
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from db.mysql_connection import MySQLConnection
 from auth.badge_manager import BadgeManager
-from utils.language_utils import set_language, get_current_language, t
+from utils.language_utils import get_current_language, t_for
 
 # Configure logging
 logging.basicConfig(
@@ -19,31 +23,157 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Only used to check legacy unsalted password digests (see _verify_password)
+_sha256 = hashlib.sha256
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+# SQL used by MySQLAuthManager, built once at import
+# Login reads the full profile as well, so it can prime the profile cache
+_Q_GET_USER_BY_EMAIL = """
+    SELECT uid, email, password, display_name_en, display_name_zh, 
+        level_name_en, level_name_zh,
+        reviews_completed, score, tutorial_completed,
+        created_at, last_activity, consecutive_days, total_points
+    FROM users 
+    WHERE email = %s
+"""
+_Q_GET_USER_BY_UID = """
+    SELECT uid, email, display_name_en, display_name_zh, 
+        level_name_en, level_name_zh,
+        reviews_completed, score, tutorial_completed,
+        created_at, last_activity, consecutive_days, total_points
+    FROM users 
+    WHERE uid = %s
+"""
+# A duplicate email turns into a no-op update (0 affected rows; the connector
+# does not set CLIENT_FOUND_ROWS), while any other bad value still fails
+_Q_INSERT_USER = """
+    INSERT INTO users 
+    (uid, email, display_name_en, display_name_zh, password, level_name_en, level_name_zh) 
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE uid = uid
+"""
+_Q_UPDATE_PASSWORD = "UPDATE users SET password = %s WHERE uid = %s"
+# Skips the write when the flag already has the value; <=> so a NULL flag is still updated
+_Q_UPDATE_TUTORIAL = """
+    UPDATE users 
+    SET tutorial_completed = %s 
+    WHERE uid = %s AND NOT (tutorial_completed <=> %s)
+"""
+_Q_USER_EXISTS = "SELECT 1 AS found FROM users WHERE uid = %s"
+# Locks the row until update_review_stats' transaction commits
+_Q_GET_REVIEW_STATS = """
+    SELECT reviews_completed, score, level_name_en 
+    FROM users 
+    WHERE uid = %s
+    FOR UPDATE
+"""
+_Q_UPDATE_REVIEW_STATS_WITH_LEVEL = """
+    UPDATE users 
+    SET reviews_completed = %s, score = %s, 
+    level_name_en = %s, level_name_zh = %s 
+    WHERE uid = %s
+"""
+_Q_UPDATE_REVIEW_STATS = """
+    UPDATE users 
+    SET reviews_completed = %s, score = %s 
+    WHERE uid = %s
+"""
+_Q_ALL_USERS = """
+    SELECT uid, email, display_name_en, display_name_zh,
+    level_name_en, level_name_zh,
+    created_at, reviews_completed, total_points
+    FROM users
+"""
+
+# Profile columns update_user_profile may write
+_SAFE_UPDATE_FIELDS = frozenset({
+    "display_name_en", "display_name_zh",
+    "level_name_en", "level_name_zh", "reviews_completed"
+})
+
+# Levels as (score above which it applies, English name, Chinese name), highest first
+_LEVEL_TIERS = ((200, "Senior", "高級"), (100, "Medium", "中級"), (-1, "Basic", "基礎"))
+
+# Chinese name and rank of each level, keyed by the lower-cased English name
+_LEVEL_ZH = {en.lower(): zh for _, en, zh in _LEVEL_TIERS}
+_LEVEL_RANK = {en.lower(): len(_LEVEL_TIERS) - i for i, (_, en, _) in enumerate(_LEVEL_TIERS)}
+
+# Level name given to new users, per language
+_DEFAULT_LEVELS = {"en": t_for("en", "basic"), "zh": t_for("zh", "basic")}
+
 class MySQLAuthManager:
     """
     Manager for MySQL-based authentication and user management.
     """
     
     _instance = None
+    _instance_lock = threading.Lock()
+    
+    # Profiles served from memory between writes, as (loaded_at, profile). Badge
+    # awards outside this class can change total_points, so entries also expire.
+    PROFILE_CACHE_TTL = 60  # seconds
+    _profile_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
     
     def __new__(cls):
         """Ensure singleton instance."""
+        # Double-checked locking: the lock is only taken until the instance exists
         if cls._instance is None:
-            cls._instance = super(MySQLAuthManager, cls).__new__(cls)
-            cls._instance._initialized = False
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(MySQLAuthManager, cls).__new__(cls)
+                    object.__setattr__(instance, "_initialized", False)
+                    cls._instance = instance
         return cls._instance
     
     def __init__(self):
         """Initialize the MySQLAuthManager."""
         if self._initialized:
             return
-            
-        self.db = MySQLConnection()
-        self._initialized = True
+        
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self.db = MySQLConnection()
+            # Set last, so other threads only skip setup once it has finished
+            object.__setattr__(self, "_initialized", True)
+    
+    def _invalidate_profile(self, user_id: str) -> None:
+        """Drop a user's cached profile after a write to their row."""
+        self._profile_cache.pop(user_id, None)
+    
+    # bcrypt work factor; each hash or check costs roughly 2**BCRYPT_ROUNDS rounds
+    BCRYPT_ROUNDS = 12
     
     def _hash_password(self, password: str) -> str:
-        """Hash a password using SHA-256."""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash a password using bcrypt with a per-password salt."""
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=self.BCRYPT_ROUNDS)).decode()
+    
+    def _is_legacy_hash(self, stored: str) -> bool:
+        """Check whether a stored password is an unsalted SHA-256 hex digest from before bcrypt."""
+        return len(stored) == 64 and _HEX_DIGITS.issuperset(stored)
+    
+    def _verify_password(self, password: str, stored: str) -> bool:
+        """
+        Check a password against its stored hash.
+        
+        Args:
+            password: Password entered by the user
+            stored: Stored bcrypt hash or legacy SHA-256 digest
+            
+        Returns:
+            True if the password matches
+        """
+        if not stored:
+            return False
+        if self._is_legacy_hash(stored):
+            # Compare raw digests rather than formatting the new digest as hex
+            return hmac.compare_digest(_sha256(password.encode()).digest(), bytes.fromhex(stored))
+        try:
+            return bcrypt.checkpw(password.encode(), stored.encode())
+        except ValueError:
+            logger.warning("Stored password hash has an unrecognised format")
+            return False
     
 
     def update_tutorial_completion(self, user_id: str, completed: bool) -> Dict[str, Any]:
@@ -59,20 +189,21 @@ class MySQLAuthManager:
         """
         try:
             # Update tutorial completion status
-            update_query = """
-            UPDATE users 
-            SET tutorial_completed = %s 
-            WHERE uid = %s
-            """
-            
-            affected_rows = self.db.execute_query(update_query, (completed, user_id))
+            affected_rows = self.db.execute_query(_Q_UPDATE_TUTORIAL, (completed, user_id, completed))
             
             if affected_rows is not None and affected_rows > 0:
+                self._invalidate_profile(user_id)
                 logger.debug(f"Updated tutorial completion status for user {user_id} to {completed}")
                 return {
                     "success": True,
                     "tutorial_completed": completed
                 }
+            elif affected_rows == 0 and self.db.execute_prepared(_Q_USER_EXISTS, (user_id,), fetch_one=True):
+                # Nothing to write: the flag already had this value
+                return {
+                    "success": True,
+                    "tutorial_completed": completed
+                }
             else:
                 logger.warning(f"No rows affected when updating tutorial completion for user {user_id}")
                 return {
@@ -91,55 +222,25 @@ class MySQLAuthManager:
                  level_name_en: str = None, 
                  level_name_zh: str = None) -> Dict[str, Any]:
         """Register a new user with multilingual support."""
-        # Check if email is already in use
-        check_query = "SELECT email FROM users WHERE email = %s"
-        result = self.db.execute_query(check_query, (email,), fetch_one=True)
-        
-        if result:
-            return {"success": False, "error": "Email already in use"}
-        
         # Generate a unique user ID
         user_id = str(uuid.uuid4())
         
         # Hash the password
         hashed_password = self._hash_password(password)
             
-        # If level names are not provided, get them from translation
-        if not level_name_en or not level_name_zh:
-            # Save current language
-            current_lang = get_current_language()
-            
-            # Default level value
-            default_level = "basic"
-            
-            # Get English level name
-            if not level_name_en:
-                set_language("en")
-                level_name_en = t(default_level)
-            
-            # Get Chinese level name
-            if not level_name_zh:
-                set_language("zh")
-                level_name_zh = t(default_level)
-            
-            # Restore original language
-            set_language(current_lang)
-        
-        # Prepare the SQL query based on existing columns
-        columns = ["uid", "email", "display_name_en", "display_name_zh", "password", "level_name_en", "level_name_zh"]
-        values = [user_id, email, display_name_en, display_name_zh, hashed_password, level_name_en, level_name_zh]
-        
-        # Create the SQL query
-        columns_str = ", ".join(columns)
-        placeholders = ", ".join(["%s"] * len(values))
-        insert_query = f"""
-            INSERT INTO users 
-            ({columns_str}) 
-            VALUES ({placeholders})
-        """
-        
-        # Execute the query
-        affected_rows = self.db.execute_query(insert_query, tuple(values))
+        # If level names are not provided, use the translated default level
+        level_name_en = level_name_en or _DEFAULT_LEVELS["en"]
+        level_name_zh = level_name_zh or _DEFAULT_LEVELS["zh"]
+        
+        # The unique email key turns a duplicate into a no-op instead of needing a prior lookup;
+        # other insert errors come back as None
+        affected_rows = self.db.execute_prepared(
+            _Q_INSERT_USER,
+            (user_id, email, display_name_en, display_name_zh, hashed_password, level_name_en, level_name_zh)
+        )
+        
+        if affected_rows == 0:
+            return {"success": False, "error": "Email already in use"}
         
         if affected_rows:
             logger.debug(f"Registered new user: {email} (ID: {user_id})")
@@ -169,15 +270,7 @@ class MySQLAuthManager:
         """
         try:
             # Get user by email with tutorial completion status
-            query = """
-            SELECT uid, email, password, display_name_en, display_name_zh, 
-                level_name_en, level_name_zh,
-                reviews_completed, score, tutorial_completed
-            FROM users 
-            WHERE email = %s
-            """
-            
-            user_data = self.db.execute_query(query, (email,), fetch_one=True)
+            user_data = self.db.execute_prepared(_Q_GET_USER_BY_EMAIL, (email,), fetch_one=True)
             
             if not user_data:
                 logger.warning(f"Authentication failed: User not found for email {email}")
@@ -186,18 +279,34 @@ class MySQLAuthManager:
                     "error": "Invalid email or password"
                 }
             
-           
+            if not self._verify_password(password, user_data["password"]):
+                logger.warning(f"Authentication failed: Wrong password for email {email}")
+                return {
+                    "success": False,
+                    "error": "Invalid email or password"
+                }
+            
+            # Move legacy SHA-256 passwords to bcrypt now that the plain password is known
+            if self._is_legacy_hash(user_data["password"]):
+                self.db.execute_query(
+                    _Q_UPDATE_PASSWORD,
+                    (self._hash_password(password), user_data["uid"])
+                )
+            
+            # The first rerun after login reads the profile; serve it from this row
+            profile = self._cache_profile(user_data)
+            
             return {
                     "success": True,
-                    "user_id": user_data["uid"],
-                    "email": user_data["email"],
-                    "display_name_en": user_data["display_name_en"],
-                    "display_name_zh": user_data["display_name_zh"],
-                    "level_name_en": user_data["level_name_en"],
-                    "level_name_zh": user_data["level_name_zh"],                    
-                    "reviews_completed": user_data["reviews_completed"],
-                    "score": user_data["score"],
-                    "tutorial_completed": user_data["tutorial_completed"]
+                    "user_id": profile["user_id"],
+                    "email": profile["email"],
+                    "display_name_en": profile["display_name_en"],
+                    "display_name_zh": profile["display_name_zh"],
+                    "level_name_en": profile["level_name_en"],
+                    "level_name_zh": profile["level_name_zh"],                    
+                    "reviews_completed": profile["reviews_completed"],
+                    "score": profile["score"],
+                    "tutorial_completed": profile["tutorial_completed"]
                 }
             
                 
@@ -218,36 +327,16 @@ class MySQLAuthManager:
         Returns:
             Dictionary with user profile data
         """
+        cached = self._profile_cache.get(user_id)
+        if cached and time.monotonic() - cached[0] <= self.PROFILE_CACHE_TTL:
+            return dict(cached[1])
+        
         try:
             # Get user profile with tutorial completion status
-            query = """
-            SELECT uid, email, display_name_en, display_name_zh, 
-                level_name_en, level_name_zh,
-                reviews_completed, score, tutorial_completed,
-                created_at, last_activity, consecutive_days, total_points
-            FROM users 
-            WHERE uid = %s
-            """
-            
-            user_data = self.db.execute_query(query, (user_id,), fetch_one=True)
+            user_data = self.db.execute_prepared(_Q_GET_USER_BY_UID, (user_id,), fetch_one=True)
             
             if user_data:
-                return {
-                    "success": True,
-                    "user_id": user_data["uid"],
-                    "email": user_data["email"],
-                    "display_name_en": user_data["display_name_en"],
-                    "display_name_zh": user_data["display_name_zh"],
-                    "level_name_en": user_data["level_name_en"],
-                    "level_name_zh": user_data["level_name_zh"],                   
-                    "reviews_completed": user_data["reviews_completed"],
-                    "score": user_data["score"],
-                    "tutorial_completed": user_data["tutorial_completed"],
-                    "created_at": user_data["created_at"],
-                    "last_activity": user_data["last_activity"],
-                    "consecutive_days": user_data["consecutive_days"],
-                    "total_points": user_data["total_points"]
-                }
+                return dict(self._cache_profile(user_data))
             else:
                 return {
                     "success": False,
@@ -261,13 +350,39 @@ class MySQLAuthManager:
                 "error": str(e)
             }
     
+    def _cache_profile(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build a profile from a users row and store it in the profile cache.
+        
+        Args:
+            user_data: Row with the columns of _Q_GET_USER_BY_UID
+            
+        Returns:
+            The cached profile dictionary (callers must copy before handing it out)
+        """
+        profile = {
+            "success": True,
+            "user_id": user_data["uid"],
+            "email": user_data["email"],
+            "display_name_en": user_data["display_name_en"],
+            "display_name_zh": user_data["display_name_zh"],
+            "level_name_en": user_data["level_name_en"],
+            "level_name_zh": user_data["level_name_zh"],
+            "reviews_completed": user_data["reviews_completed"],
+            "score": user_data["score"],
+            "tutorial_completed": user_data["tutorial_completed"],
+            "created_at": user_data["created_at"],
+            "last_activity": user_data["last_activity"],
+            "consecutive_days": user_data["consecutive_days"],
+            "total_points": user_data["total_points"]
+        }
+        self._profile_cache[profile["user_id"]] = (time.monotonic(), profile)
+        return profile
+    
     def update_user_profile(self, user_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Update a user's profile."""
         # Ensure we don't update sensitive fields
-        safe_updates = {k: v for k, v in updates.items() if k in [
-            "display_name_en", "display_name_zh", 
-            "level_name_en", "level_name_zh", "reviews_completed"
-        ]}
+        safe_updates = {k: v for k, v in updates.items() if k in _SAFE_UPDATE_FIELDS}
         
         if not safe_updates:
             return {"success": True}  # Nothing to update
@@ -290,6 +405,7 @@ class MySQLAuthManager:
         """
         
         affected_rows = self.db.execute_query(query, tuple(values))
+        self._invalidate_profile(user_id)
         
         if affected_rows is not None:
             return {"success": True}
@@ -314,15 +430,117 @@ class MySQLAuthManager:
             logger.error("Database connection not initialized")
             return {"success": False, "error": "Database connection not initialized"}
         
-        # Get current stats
-        query = """
-            SELECT reviews_completed, score, level_name_en, level_name_zh 
-            FROM users 
-            WHERE uid = %s
+        # Stats, points, streak and badges share one connection and commit together
+        try:
+            with self.db.transaction():
+                result = self._record_review(user_id, accuracy, score)
+        except Exception as e:
+            # The transaction was rolled back; nothing from this review was saved
+            logger.error(f"Error updating review stats for user {user_id}: {str(e)}")
+            result = {"success": False, "error": "Error updating review stats"}
+        
+        # Stats, points, streak and badges all changed the user's row; drop
+        # the cached profile only after the commit so it cannot be re-read stale
+        self._invalidate_profile(user_id)
+        
+        return result
+    
+    def _record_review(self, user_id: str, accuracy: float, score: int) -> Dict[str, Any]:
+        """
+        Apply review statistics, points and badges; runs inside update_review_stats' transaction.
+        
+        Args:
+            user_id: The user's ID
+            accuracy: The accuracy of the review (0-100 percentage)
+            score: Number of errors detected in the review
+            
+        Returns:
+            Dict containing success status and updated statistics
+        """
+        stats = self._apply_review_stats(user_id, score)
+        if not stats.get("success"):
+            return stats
+        
+        new_reviews = stats["reviews_completed"]
+        result = {
+            "success": True,
+            "reviews_completed": new_reviews,
+            "score": stats["score"]
+        }
+        
+        # Add level information if it changed
+        if stats["new_level_en"] != stats["old_level_en"]:
+            result["level_changed"] = True
+            result["old_level"] = stats["old_level_en"]
+            result["new_level"] = stats["new_level_en"]
+        
+        # Initialize badge manager
+        badge_manager = BadgeManager()
+
+        # Award points for the review
+        base_points = 10  # Base points for completing a review
+        accuracy_bonus = int(accuracy / 10)  # 0-10 bonus points based on accuracy
+        total_points = base_points + accuracy_bonus + score  # Add points for each error found
+        
+        badge_manager.award_points(
+            user_id, 
+            total_points,
+            "review_completion",
+            f"Review completion with {accuracy:.1f}% accuracy, found {score} errors"
+        )
+        
+        # Update consecutive days
+        badge_manager.update_consecutive_days(user_id)
+        
+        # Check for review completion badges
+        all_errors_found = accuracy >= 100.0
+        badge_manager.check_review_completion_badges(user_id, new_reviews, all_errors_found)
+        
+        return result
+    
+    def _apply_review_stats(self, user_id: str, score: int) -> Dict[str, Any]:
+        """
+        Count a completed review, add its score and upgrade the level in one round trip.
+        
+        Args:
+            user_id: The user's ID
+            score: Number of errors detected in the review
+            
+        Returns:
+            Dict with success status, the new counters and the old and new English level
         """
+        # Row lock, CASE-based UPDATE and read-back all run inside sp_update_review_stats
+        rows = self.db.call_procedure("sp_update_review_stats", (user_id, score))
+        if rows is None:
+            return self._apply_review_stats_with_queries(user_id, score)
         
+        if not rows:
+            logger.error(f"User {user_id} not found in database")
+            return {"success": False, "error": "User not found"}
+        
+        row = rows[0]
+        return {
+            "success": True,
+            "reviews_completed": row["reviews_completed"],
+            "score": row["score"],
+            "old_level_en": row["old_level_en"],
+            "new_level_en": row["level_name_en"]
+        }
+    
+    def _apply_review_stats_with_queries(self, user_id: str, score: int) -> Dict[str, Any]:
+        """
+        Apply review statistics with individual queries when sp_update_review_stats is unavailable.
+        
+        Args:
+            user_id: The user's ID
+            score: Number of errors detected in the review
+            
+        Returns:
+            Dict with success status, the new counters and the old and new English level
+        """
+        # Get current stats
         logger.debug(f"Executing query to get current stats for user {user_id}")
-        result = self.db.execute_query(query, (user_id,), fetch_one=True)
+        result = self.db.execute_query(_Q_GET_REVIEW_STATS, (user_id,), fetch_one=True)
         
         if not result:
             logger.error(f"User {user_id} not found in database")
@@ -332,121 +550,67 @@ class MySQLAuthManager:
         current_reviews = result["reviews_completed"]
         current_score = result.get("score", 0)
         current_level_en = result.get("level_name_en", "basic")  # Default to basic if not set
-        current_level_zh = result.get("level_name_zh", "基礎")   # Default to Chinese equivalent of basic
         
         new_reviews = current_reviews + 1
         new_score = current_score + score
         
-        # Determine if level upgrade is needed based on new score
+        # Upgrade to the score's tier if it ranks above the current level. Levels
+        # outside the table rank like Medium, so only a Senior score upgrades them.
         new_level_en = current_level_en
-        new_level_zh = current_level_zh
-        
-        if new_score > 200:
-            # Senior level
-            if current_level_en != "Senior" and current_level_en != "senior":
-                new_level_en = "Senior"
-                new_level_zh = "高級"
-        elif new_score > 100 and (current_level_en == "Basic" or current_level_en == "basic"):
-            # Medium level
-            new_level_en = "Medium"
-            new_level_zh = "中級"
+        current_rank = _LEVEL_RANK.get((current_level_en or "").lower(), _LEVEL_RANK["medium"])
+        for threshold, level_en, _ in _LEVEL_TIERS:
+            if new_score > threshold:
+                if _LEVEL_RANK[level_en.lower()] > current_rank:
+                    new_level_en = level_en
+                break
         
         # Only update level if it changed
         level_changed = (new_level_en != current_level_en)
         
         # Update the database
         if level_changed:
-            update_query = """
-                UPDATE users 
-                SET reviews_completed = %s, score = %s, 
-                level_name_en = %s, level_name_zh = %s 
-                WHERE uid = %s
-            """
-            
+            # The Chinese level is derived from the English one rather than read back
             affected_rows = self.db.execute_query(
-                update_query, 
-                (new_reviews, new_score, new_level_en, new_level_zh, user_id)
+                _Q_UPDATE_REVIEW_STATS_WITH_LEVEL, 
+                (new_reviews, new_score, new_level_en, _LEVEL_ZH[new_level_en.lower()], user_id)
             )
         else:
-            update_query = """
-                UPDATE users 
-                SET reviews_completed = %s, score = %s 
-                WHERE uid = %s
-            """
-            
             affected_rows = self.db.execute_query(
-                update_query, 
+                _Q_UPDATE_REVIEW_STATS, 
                 (new_reviews, new_score, user_id)
             )
         
-        if affected_rows is not None and affected_rows >= 0:
-            result = {
-                "success": True,
-                "reviews_completed": new_reviews,
-                "score": new_score
-            }
-            
-            # Add level information if it changed
-            if level_changed:
-                result["level_changed"] = True
-                result["old_level"] = current_level_en
-                result["new_level"] = new_level_en
-            
-            # Initialize badge manager
-            badge_manager = BadgeManager()
-
-            # Award points for the review
-            base_points = 10  # Base points for completing a review
-            accuracy_bonus = int(accuracy / 10)  # 0-10 bonus points based on accuracy
-            total_points = base_points + accuracy_bonus + score  # Add points for each error found
-            
-            badge_manager.award_points(
-                user_id, 
-                total_points,
-                "review_completion",
-                f"Review completion with {accuracy:.1f}% accuracy, found {score} errors"
-            )
-            
-            # Update consecutive days
-            badge_manager.update_consecutive_days(user_id)
-            
-            # Check for review completion badges
-            all_errors_found = accuracy >= 100.0
-            badge_manager.check_review_completion_badges(user_id, new_reviews, all_errors_found)
-            
-            return result
-        else:
+        if affected_rows is None or affected_rows < 0:
             logger.error("Database update failed or returned None")
             return {"success": False, "error": "Error updating review stats"}
+        
+        return {
+            "success": True,
+            "reviews_completed": new_reviews,
+            "score": new_score,
+            "old_level_en": current_level_en,
+            "new_level_en": new_level_en
+        }
     
     def get_all_users(self) -> List[Dict[str, Any]]:
         """Get a list of all users with proper language support."""
-        # Get current language for field selection
+        return list(self.iter_all_users())
+    
+    def iter_all_users(self) -> Iterator[Dict[str, Any]]:
+        """Stream all users with proper language support, one row at a time."""
+        # Pick the language-specific columns once, not per row
         current_lang = get_current_language()
-        
-        query = """
-            SELECT uid, email, display_name_en, display_name_zh,
-            level_name_en, level_name_zh,
-            created_at, reviews_completed, total_points
-            FROM users
-        """
-        
-        users = self.db.execute_query(query)
-        
-        if users is None:
-            return []
+        if current_lang not in ("en", "zh"):
+            current_lang = "en"
+        display_name_key = f"display_name_{current_lang}"
+        level_key = f"level_name_{current_lang}"
         
         # Process each user to select language-appropriate fields
-        for user in users:
-            # Choose display name based on current language
-            display_name = user.get(f"display_name_{current_lang}") if current_lang in ["en", "zh"] else user.get("display_name_en", "")
-            user["display_name"] = display_name
-            
-            # Choose level based on current language
-            level_name = user.get(f"level_name_{current_lang}") if current_lang in ["en", "zh"] else user.get("level_name_en", "Basic")
-            user["level"] = level_name
+        for user in self.db.iter_query(_Q_ALL_USERS):
+            user["display_name"] = user[display_name_key]
+            user["level"] = user[level_key]
             
             # Rename uid to user_id for consistency with the rest of the app
             user["user_id"] = user.pop("uid")
-        
-        return users
\ No newline at end of file
+            
+            yield user
\ No newline at end of file
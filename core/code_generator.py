@@ -8,10 +8,13 @@ eliminating the reliance on predefined templates.
 
 import random
 import logging
+import functools
+from types import MappingProxyType
+from typing import Any, Callable, Optional, Tuple
 from langchain_core.language_models import BaseLanguageModel
 from utils.code_utils import create_code_generation_prompt
 from utils.llm_logger import LLMInteractionLogger
-from utils.language_utils import t
+from utils.language_utils import t, get_current_language
 
 # Configure logging
 logging.basicConfig(
@@ -20,11 +23,100 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Stand-in for the domain in cached prompt skeletons
+_DOMAIN_PLACEHOLDER = "__PEERVER_DOMAIN__"
+
+# Error fields that feed into the code generation prompt
+_PROMPT_ERROR_FIELDS = ("category", "error_name_variable", "description", "implementation_guide")
+
+
+def _errors_key(selected_errors) -> Optional[Tuple[Tuple[Tuple[str, Any], ...], ...]]:
+    """
+    Build a hashable key from the error fields used by the generation prompt.
+    
+    Args:
+        selected_errors: List of error dictionaries, or None for clean code
+        
+    Returns:
+        Tuple of per-error (field, value) pairs, or None when no errors were given
+    """
+    if selected_errors is None:
+        return None
+    fields = [t(field) for field in _PROMPT_ERROR_FIELDS]
+    # Absent fields are left out so the prompt builder applies its own defaults
+    return tuple(
+        tuple((field, error[field]) for field in fields if field in error)
+        for error in selected_errors
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_prompt_skeleton(language: str, code_length: str, difficulty_level: str,
+                            errors_key: Optional[Tuple[Tuple[Tuple[str, Any], ...], ...]]) -> str:
+    """
+    Build a code generation prompt with a placeholder in place of the domain.
+    
+    Args:
+        language: Current UI language, which selects the prompt templates
+        code_length: Desired code length (short, medium, long)
+        difficulty_level: Difficulty level (easy, medium, hard)
+        errors_key: Key from _errors_key
+        
+    Returns:
+        Prompt containing _DOMAIN_PLACEHOLDER wherever the domain goes
+    """
+    selected_errors = None
+    if errors_key is not None:
+        selected_errors = [dict(pairs) for pairs in errors_key]
+    return create_code_generation_prompt(
+        code_length=code_length,
+        difficulty_level=difficulty_level,
+        selected_errors=selected_errors,
+        domain=_DOMAIN_PLACEHOLDER,
+        include_error_annotations=selected_errors is not None
+    )
+
+
 class CodeGenerator:
     """
     Generates Java code snippets dynamically without relying on predefined templates.
     This class creates realistic Java code based on specified complexity and length.
     """
+    # Complexity profiles for different code lengths (read-only, shared by all instances)
+    _COMPLEXITY_PROFILES = MappingProxyType({
+        "short": MappingProxyType({
+            "class_count": 1,
+            "method_count_range": (1, 2),  # Reduced to 1-2 methods for beginners
+            "field_count_range": (1, 3),   # Fewer fields
+            "imports_count_range": (0, 1), # Minimal imports
+            "nested_class_prob": 0.0,      # No nested classes for beginners
+            "interface_prob": 0.0          # No interfaces for beginners
+        }),
+        "medium": MappingProxyType({
+            "class_count": 1,
+            "method_count_range": (3, 5),  # Reduced from 3-6 to 3-5
+            "field_count_range": (2, 5),   # Reduced field count
+            "imports_count_range": (0, 3), # Fewer imports
+            "nested_class_prob": 0.1,      # Reduced probability of nested classes
+            "interface_prob": 0.1          # Reduced probability of interfaces
+        }),
+        "long": MappingProxyType({
+            "class_count": 1,              # Changed from 2 to 1 (with possibility of 2)
+            "method_count_range": (4, 8),  # Reduced from 5-10 to 4-8
+            "field_count_range": (3, 6),   # Reduced from 4-8 to 3-6
+            "imports_count_range": (1, 4), # Reduced from 2-6 to 1-4
+            "nested_class_prob": 0.3,      # Reduced from 0.5 to 0.3
+            "interface_prob": 0.2          # Reduced from 0.4 to 0.2
+        })
+    })
+    
+    # Common Java domains to make code more realistic
+    DOMAINS = (
+        "user_management", "file_processing", "data_validation", 
+        "calculation", "inventory_system", "notification_service",
+        "logging", "banking", "e-commerce", "student_management"
+    )
+    
     def __init__(self, llm: BaseLanguageModel = None, llm_logger: LLMInteractionLogger = None):
         """
         Initialize the CodeGenerator with an optional language model.
@@ -35,44 +127,9 @@ class CodeGenerator:
         """
         self.llm = llm
         self.llm_logger = llm_logger or LLMInteractionLogger()
-        
-        # Define complexity profiles for different code lengths
-        self.complexity_profiles = {
-            "short": {
-                "class_count": 1,
-                "method_count_range": (1, 2),  # Reduced to 1-2 methods for beginners
-                "field_count_range": (1, 3),   # Fewer fields
-                "imports_count_range": (0, 1), # Minimal imports
-                "nested_class_prob": 0.0,      # No nested classes for beginners
-                "interface_prob": 0.0          # No interfaces for beginners
-            },
-            "medium": {
-                "class_count": 1,
-                "method_count_range": (3, 5),  # Reduced from 3-6 to 3-5
-                "field_count_range": (2, 5),   # Reduced field count
-                "imports_count_range": (0, 3), # Fewer imports
-                "nested_class_prob": 0.1,      # Reduced probability of nested classes
-                "interface_prob": 0.1          # Reduced probability of interfaces
-            },
-            "long": {
-                "class_count": 1,              # Changed from 2 to 1 (with possibility of 2)
-                "method_count_range": (4, 8),  # Reduced from 5-10 to 4-8
-                "field_count_range": (3, 6),   # Reduced from 4-8 to 3-6
-                "imports_count_range": (1, 4), # Reduced from 2-6 to 1-4
-                "nested_class_prob": 0.3,      # Reduced from 0.5 to 0.3
-                "interface_prob": 0.2          # Reduced from 0.4 to 0.2
-            }
-        }
-        
-        # Common Java domains to make code more realistic
-        self.domains = [
-            "user_management", "file_processing", "data_validation", 
-            "calculation", "inventory_system", "notification_service",
-            "logging", "banking", "e-commerce", "student_management"
-        ]
      
     def _generate_with_llm(self, code_length: str, difficulty_level: str, domain: str = None, 
-                       selected_errors=None) -> str:
+                       selected_errors=None, on_token: Callable[[str], None] = None) -> str:
         """
         Generate Java code using the language model.        
         
@@ -81,6 +138,7 @@ class CodeGenerator:
             difficulty_level: Difficulty level (easy, medium, hard)
             domain: Optional domain for the code context
             selected_errors: Optional list of errors to include
+            on_token: Optional callback that receives each streamed text chunk
             
         Returns:
             Generated Java code as a string or AIMessage object
@@ -92,16 +150,17 @@ class CodeGenerator:
     
         # Select a domain if not provided
         if not domain:
-            domain = random.choice(self.domains)
+            domain = random.choice(self.DOMAINS)
         
-        # Create a detailed prompt for the LLM using shared utility
-        prompt = create_code_generation_prompt(
-            code_length=code_length,
-            difficulty_level=difficulty_level,
-            selected_errors=selected_errors,  # No errors for clean code
-            domain=domain,
-            include_error_annotations=False if selected_errors is None else True
+        # Create a detailed prompt for the LLM using shared utility; the
+        # skeleton is reused across generations that differ only in domain
+        skeleton = _cached_prompt_skeleton(
+            get_current_language(),
+            str(code_length),
+            str(difficulty_level),
+            _errors_key(selected_errors)  # None for clean code
         )
+        prompt = skeleton.replace(_DOMAIN_PLACEHOLDER, domain)
             
         try:
             # Metadata for logging
@@ -126,8 +185,17 @@ class CodeGenerator:
                     domain=domain
                 ))
             
-            # Generate the code using the LLM
-            response = self.llm.invoke(prompt)
+            # Generate the code using the LLM, streaming chunks when a callback is given
+            if on_token is not None:
+                chunks = []
+                for chunk in self.llm.stream(prompt):
+                    text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                    if text:
+                        chunks.append(text)
+                        on_token(text)
+                response = "".join(chunks)
+            else:
+                response = self.llm.invoke(prompt)
             
             # Log the response type
             logger.debug(t("llm_response_type").format(type=type(response).__name__))
@@ -1,13 +1,32 @@
 import re
 import os
+import asyncio
 import logging
 import json
-from typing import List, Dict, Any, Optional, Tuple
+import copy
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 from langchain_core.language_models import BaseLanguageModel
 
-from utils.code_utils import create_review_analysis_prompt, create_feedback_prompt, create_comparison_report_prompt, process_llm_response
+from utils.code_utils import (
+    create_review_analysis_prompt, create_feedback_prompt, create_comparison_report_prompt, process_llm_response,
+    find_json_object, loads_lenient, stream_first_json_object
+)
 from utils.llm_logger import LLMInteractionLogger
-from utils.language_utils import t
+from utils.language_utils import t, t_for, get_current_language, language_scope
+
+# orjson parses considerably faster when available; its JSONDecodeError
+# subclasses json.JSONDecodeError, so the except clauses work for both
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -15,6 +34,224 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Patterns used to parse LLM review analyses, compiled once
+_IDENT_PROBLEMS_RE = re.compile(r'"(已識別的問題|Identified Problems)"\s*:\s*\[(.*?)\]', re.DOTALL)
+_MISSED_RE = re.compile(r'"(遺漏的問題|Missed Problems)"\s*:\s*\[(.*?)\]', re.DOTALL)
+_KV_RE = re.compile(r'"([^"]+)"\s*:\s*(.+)')
+_COUNT_RE = re.compile(r'"(已識別數量|Identified Count)"\s*:\s*(\d+)')
+_TOTAL_RE = re.compile(r'"(總問題數|Total Problems)"\s*:\s*(\d+)')
+_PCT_RE = re.compile(r'"(識別百分比|Identified Percentage)"\s*:\s*([0-9.]+)')
+_SUFFICIENT_RE = re.compile(r'"(審查足夠|Review Sufficient)"\s*:\s*(true|false)', re.IGNORECASE)
+# Expected review line format: "Line X: Description of issue"; the gaps
+# exclude newlines so a match never spans two review lines
+_VALID_LINE_RE = re.compile(r'(?:Line|行)[^\S\n]*\d+[^\S\n]*[:：]')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+# Line numbers the student refers to, e.g. "Line 12" or "行 12"
+_LINE_REF_RE = re.compile(r'(?:Line|行)[^\S\n]*(\d+)', re.IGNORECASE)
+
+# Analysis field labels in either prompt language, mapped to translation keys
+_ANALYSIS_LABELS = {
+    "Identified Problems": "identified_problems",
+    "已識別的問題": "identified_problems",
+    "Missed Problems": "missed_problems",
+    "遺漏的問題": "missed_problems",
+    "Identified Count": "identified_count",
+    "已識別數量": "identified_count",
+    "Total Problems": "total_problems",
+    "總問題數": "total_problems",
+    "Identified Percentage": "identified_percentage",
+    "識別百分比": "identified_percentage",
+    "Review Sufficient": "review_sufficient",
+    "審查足夠": "review_sufficient",
+}
+
+
+# Translation keys used for analysis fields and their logging metadata
+_ANALYSIS_KEY_NAMES = (
+    "identified_problems", "missed_problems", "identified_count", "total_problems",
+    "identified_percentage", "review_sufficient", "feedback", "error", "raw_text",
+    "iteration_count", "max_iterations", "remaining_attempts", "accuracy_percentage"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _analysis_keys(lang: str) -> Mapping[str, str]:
+    """
+    Resolve the analysis field keys for a language once per process.
+    
+    Args:
+        lang: Language code (e.g., 'en', 'zh')
+        
+    Returns:
+        Read-only mapping from key name to translated key
+    """
+    return MappingProxyType({name: t_for(lang, name) for name in _ANALYSIS_KEY_NAMES})
+
+
+async def _to_thread_in_language(func, *args, **kwargs):
+    """
+    Run func on a worker thread in the caller's UI language.
+    
+    Worker threads have no Streamlit session, so t() there would fall back
+    to the default language; the language is resolved here and pinned.
+    
+    Args:
+        func: Function to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+        
+    Returns:
+        Whatever func returns
+    """
+    lang = get_current_language()
+    
+    def run():
+        with language_scope(lang):
+            return func(*args, **kwargs)
+    
+    return await asyncio.to_thread(run)
+
+
+def _estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the token count of a prompt without a tokenizer.
+    
+    ASCII text averages about four characters per token; other characters
+    (e.g. Chinese) are counted as one token each.
+    
+    Args:
+        text: Prompt text
+        
+    Returns:
+        Estimated number of tokens
+    """
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return ascii_chars // 4 + (len(text) - ascii_chars)
+
+
+def _focus_code_on_review(code: str, student_review: str, context: int) -> Optional[str]:
+    """
+    Keep only the code lines referenced by a review, with surrounding context.
+    
+    Kept lines are numbered as in the full code and gaps are marked, so the
+    review's line references still line up.
+    
+    Args:
+        code: The full code snippet
+        student_review: The student's review comments
+        context: Number of lines kept before and after each referenced line
+        
+    Returns:
+        Numbered excerpt of the code, or None if the review references no lines in it
+    """
+    lines = code.split('\n')
+    referenced = {int(number) for number in _LINE_REF_RE.findall(student_review)}
+    referenced = {number for number in referenced if 1 <= number <= len(lines)}
+    if not referenced:
+        return None
+    
+    keep = set()
+    for number in referenced:
+        keep.update(range(max(1, number - context), min(len(lines), number + context) + 1))
+    
+    padding = len(str(len(lines)))
+    excerpt = []
+    previous = 0
+    for number in sorted(keep):
+        if number != previous + 1:
+            excerpt.append("...")
+        excerpt.append(f"{str(number).rjust(padding)} | {lines[number - 1]}")
+        previous = number
+    if previous != len(lines):
+        excerpt.append("...")
+    return '\n'.join(excerpt)
+
+
+def _line_count(text: str) -> int:
+    """
+    Count lines like len(text.splitlines()) for newline-separated text, without building the list.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Number of lines
+    """
+    if not text:
+        return 0
+    return text.count('\n') + (0 if text.endswith('\n') else 1)
+
+
+def _parse_problem_array(inner: str) -> List[Dict[str, Any]]:
+    """
+    Parse the body of a malformed JSON array of problem objects line by line.
+    
+    Args:
+        inner: Text between the array brackets
+        
+    Returns:
+        List of problem dictionaries
+    """
+    problem_objects = []
+    current_problem = {}
+    
+    for line in inner.strip().split('\n'):
+        line = line.strip()
+        
+        # Skip empty lines or just containing brackets/braces
+        if not line or line in ['{', '}', '[', ']']:
+            continue
+        
+        # Check for key-value pairs
+        key_value_match = _KV_RE.search(line)
+        if key_value_match:
+            key = key_value_match.group(1)
+            value = key_value_match.group(2).strip()
+            
+            # Remove trailing comma if present
+            if value.endswith(','):
+                value = value[:-1].strip()
+            
+            # Handle string values (quoted)
+            if value.startswith('"') and value.endswith('"'):
+                current_problem[key] = value[1:-1]
+            # Handle numeric values
+            elif value.replace('.', '', 1).isdigit():
+                current_problem[key] = float(value) if '.' in value else int(value)
+            # Handle boolean values
+            elif value.lower() in ['true', 'false']:
+                current_problem[key] = value.lower() == 'true'
+            else:
+                current_problem[key] = value
+        
+        # If we see a closing brace, add the current problem to the list
+        if '}' in line and current_problem:
+            problem_objects.append(current_problem)
+            current_problem = {}
+    
+    # Add any remaining problem
+    if current_problem:
+        problem_objects.append(current_problem)
+    
+    return problem_objects
+
+
+def _localize_analysis_keys(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rename analysis fields written in the other prompt language to the current t() keys.
+    
+    Args:
+        analysis: Parsed analysis
+        
+    Returns:
+        The same dictionary, with known labels renamed where the t() key is absent
+    """
+    for label in [key for key in analysis if key in _ANALYSIS_LABELS]:
+        localized = t(_ANALYSIS_LABELS[label])
+        if localized != label and localized not in analysis:
+            analysis[localized] = analysis.pop(label)
+    return analysis
+
 class StudentResponseEvaluator:
     """
     Evaluates student code reviews against known problems in the code.
@@ -22,17 +259,24 @@ class StudentResponseEvaluator:
     This class analyzes how thoroughly and accurately a student identified 
     issues in a code snippet, providing detailed feedback and metrics.
     """    
+    # Maximum number of analyses kept for identical code/problems/review inputs
+    EVAL_CACHE_SIZE = 256
+    
     def __init__(self, llm: BaseLanguageModel = None,                 
-                 llm_logger: LLMInteractionLogger = None):
+                 llm_logger: LLMInteractionLogger = None, cache_results: bool = True):
         """
         Initialize the StudentResponseEvaluator.
         
         Args:
             llm: Language model to use for evaluation           
             llm_logger: Logger for tracking LLM interactions
+            cache_results: Reuse analyses for identical code, known problems and review
         """
         self.llm = llm
         self.llm_logger = llm_logger or LLMInteractionLogger()
+        self.cache_results = cache_results
+        self._eval_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._eval_cache_lock = threading.Lock()
 
         # Load meaningful score threshold from environment variable with default fallback to 0.6
         try:
@@ -46,6 +290,73 @@ class StudentResponseEvaluator:
             self.meaningful_score_threshold = 0.6
             self.accuracy_score_threshold = 0.7
     
+    # Upper bound on concurrent provider requests when reviews are batched
+    BATCH_MAX_CONCURRENCY = 4
+    
+    # Estimated prompt size above which the code is cut down to the reviewed lines
+    PROMPT_TOKEN_BUDGET = 3500
+    FOCUS_CONTEXT_LINES = 3
+    
+    @staticmethod
+    def _eval_cache_key(code_snippet: str, known_problems: List[str], student_review: str) -> bytes:
+        """
+        Build the cache key for a review evaluation.
+        
+        Args:
+            code_snippet: The original code snippet with injected errors
+            known_problems: List of known problems in the code
+            student_review: The student's review comments
+            
+        Returns:
+            Key combining the language and a SHA-256 digest of the inputs
+        """
+        digest = hashlib.sha256()
+        digest.update(code_snippet.encode())
+        digest.update(b"\0")
+        digest.update(json.dumps(known_problems, ensure_ascii=False, default=str).encode())
+        digest.update(b"\0")
+        digest.update(student_review.encode())
+        return get_current_language().encode() + b"\0" + digest.digest()
+    
+    def _get_cached_evaluation(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached review analysis.
+        
+        Args:
+            key: Key from _eval_cache_key
+            
+        Returns:
+            Copy of the cached analysis, or None on a miss
+        """
+        with self._eval_cache_lock:
+            analysis = self._eval_cache.get(key)
+            if analysis is None:
+                return None
+            self._eval_cache.move_to_end(key)
+        # Callers annotate the analysis in place
+        return copy.deepcopy(analysis)
+    
+    def _cache_evaluation(self, key: bytes, analysis: Dict[str, Any]) -> None:
+        """
+        Store a review analysis, evicting the least recently used entry when full.
+        
+        Args:
+            key: Key from _eval_cache_key
+            analysis: Enhanced analysis
+        """
+        with self._eval_cache_lock:
+            self._eval_cache[key] = copy.deepcopy(analysis)
+            self._eval_cache.move_to_end(key)
+            if len(self._eval_cache) > self.EVAL_CACHE_SIZE:
+                self._eval_cache.popitem(last=False)
+    
+    def clear_cache(self) -> None:
+        """
+        Drop all cached review analyses.
+        """
+        with self._eval_cache_lock:
+            self._eval_cache.clear()
+    
     def evaluate_review(self, code_snippet: str, known_problems: List[str], student_review: str) -> Dict[str, Any]:
         """
         Evaluate a student's review against known problems.
@@ -59,59 +370,214 @@ class StudentResponseEvaluator:
         Returns:
             Dictionary with detailed analysis results
         """
+        return self.evaluate_reviews_batch([(code_snippet, known_problems, student_review)])[0]
+    
+    def evaluate_reviews_batch(self, items: List[Tuple[str, List[str], str]]) -> List[Dict[str, Any]]:
+        """
+        Evaluate several student reviews with a single batched LLM call.
+        
+        Args:
+            items: List of (code_snippet, known_problems, student_review) tuples
+            
+        Returns:
+            Analysis results in the same order as items
+        """
         if not self.llm:
             logger.warning("No LLM available for review evaluation, using fallback evaluation")
-            return "// Error: No LLM available for code generation"
+            return ["// Error: No LLM available for code generation"] * len(items)
 
+        results: List[Any] = [""] * len(items)
+        pending = []
         try:
             logger.debug("Evaluating student review with code_utils prompt")
             
-            if not self.llm:
-                logger.warning(t("no_llm_provided_for_evaluation"))
-                return ""
-            
-            # Create a review analysis prompt using the utility function
-            prompt = create_review_analysis_prompt(
-                code=code_snippet,
-                known_problems=known_problems,
-                student_review=student_review
+            for index, (code_snippet, known_problems, student_review) in enumerate(items):
+                # Identical inputs reuse the earlier analysis
+                cache_key = None
+                if self.cache_results:
+                    cache_key = self._eval_cache_key(code_snippet, known_problems, student_review)
+                    cached = self._get_cached_evaluation(cache_key)
+                    if cached is not None:
+                        logger.debug("Reusing cached review evaluation")
+                        results[index] = cached
+                        continue
+                
+                # Create review analysis prompt using the utility function
+                prompt = self._build_review_prompt(code_snippet, known_problems, student_review)
+                pending.append((index, prompt, cache_key))
+        except Exception as e:
+            logger.error(f"{t('exception_in_evaluate_review')}: {str(e)}")
+            return [""] * len(items)
+        
+        if not pending:
+            return results
+        
+        # Get the evaluations from the LLM; a batch reports failures per prompt
+        prompts = [prompt for _, prompt, _ in pending]
+        logger.debug("Sending student review to LLM for evaluation")
+        try:
+            if len(prompts) == 1 and hasattr(self.llm, "stream"):
+                # Stop reading as soon as a complete JSON object has arrived
+                text, parsed = stream_first_json_object(self.llm, prompts[0], _json_loads)
+                responses = [(text, _localize_analysis_keys(parsed) if parsed is not None else None)]
+            elif len(prompts) == 1:
+                responses = [(self.llm.invoke(prompts[0]), None)]
+            else:
+                batch = self.llm.batch(
+                    prompts,
+                    config={"max_concurrency": self.BATCH_MAX_CONCURRENCY},
+                    return_exceptions=True
+                )
+                responses = [(response, None) for response in batch]
+        except Exception as e:
+            responses = [(e, None)] * len(prompts)
+        
+        for (index, prompt, cache_key), (response, analysis_data) in zip(pending, responses):
+            results[index] = self._complete_review_evaluation(
+                prompt, response, *items[index], analysis_data=analysis_data, cache_key=cache_key
             )
+        return results
+    
+    def _build_review_prompt(self, code_snippet: str, known_problems: List[str], student_review: str) -> str:
+        """
+        Create the review analysis prompt, keeping it within PROMPT_TOKEN_BUDGET where possible.
+        
+        An oversized prompt is rebuilt with only the code lines the review
+        refers to (plus FOCUS_CONTEXT_LINES around each), numbered as in the
+        original. Reviews without line references keep the full code.
+        
+        Args:
+            code_snippet: The original code snippet with injected errors
+            known_problems: List of known problems in the code
+            student_review: The student's review comments
             
-            try:
-                # Metadata for logging
-                metadata = {
-                    t("code_length"): len(code_snippet.splitlines()),
-                    t("known_problems_count"): len(known_problems),
-                    t("student_review_length"): len(student_review.splitlines())
-                }
-                # Get the evaluation from the LLM
-                logger.debug("Sending student review to LLM for evaluation")
-                response = self.llm.invoke(prompt)
+        Returns:
+            Review analysis prompt string
+        """
+        prompt = create_review_analysis_prompt(
+            code=code_snippet,
+            known_problems=known_problems,
+            student_review=student_review
+        )
+        if _estimate_tokens(prompt) <= self.PROMPT_TOKEN_BUDGET:
+            return prompt
+        
+        focused_code = _focus_code_on_review(code_snippet, student_review, self.FOCUS_CONTEXT_LINES)
+        if focused_code is None:
+            return prompt
+        
+        logger.debug("Review analysis prompt over token budget, sending only the referenced code lines")
+        return create_review_analysis_prompt(
+            code=focused_code,
+            known_problems=known_problems,
+            student_review=student_review
+        )
+    
+    async def aevaluate_review(self, code_snippet: str, known_problems: List[str], student_review: str) -> Dict[str, Any]:
+        """
+        Async variant of evaluate_review, so callers can await several LLM calls concurrently.
+        
+        Args:
+            code_snippet: The original code snippet with injected errors
+            known_problems: List of known problems in the code
+            student_review: The student's review comments
+            
+        Returns:
+            Dictionary with detailed analysis results
+        """
+        if not self.llm:
+            logger.warning("No LLM available for review evaluation, using fallback evaluation")
+            return "// Error: No LLM available for code generation"
+        
+        cache_key = None
+        if self.cache_results:
+            cache_key = self._eval_cache_key(code_snippet, known_problems, student_review)
+            cached = self._get_cached_evaluation(cache_key)
+            if cached is not None:
+                logger.debug("Reusing cached review evaluation")
+                return cached
+        
+        try:
+            prompt = self._build_review_prompt(code_snippet, known_problems, student_review)
+        except Exception as e:
+            logger.error(f"{t('exception_in_evaluate_review')}: {str(e)}")
+            return ""
+        
+        logger.debug("Sending student review to LLM for evaluation")
+        try:
+            response = await self.llm.ainvoke(prompt)
+        except Exception as e:
+            response = e
+        
+        # Parsing and log file writes run off the event loop
+        return await _to_thread_in_language(
+            self._complete_review_evaluation, prompt, response, code_snippet, known_problems, student_review,
+            cache_key=cache_key
+        )
+    
+    def _complete_review_evaluation(self, prompt: str, response: Any, code_snippet: str,
+                                    known_problems: List[str], student_review: str,
+                                    analysis_data: Optional[Dict[str, Any]] = None,
+                                    cache_key: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Turn one LLM review analysis response into the enhanced analysis.
+        
+        Args:
+            prompt: Prompt sent to the LLM
+            response: LLM response, or the exception raised while getting it
+            code_snippet: The original code snippet with injected errors
+            known_problems: List of known problems in the code
+            student_review: The student's review comments
+            analysis_data: Analysis already parsed while streaming, if any
+            cache_key: Key to cache the analysis under, or None
+            
+        Returns:
+            Dictionary with detailed analysis results, or "" on failure
+        """
+        k = _analysis_keys(get_current_language())
+        # Metadata for logging
+        metadata = {
+            t("code_length"): _line_count(code_snippet),
+            t("known_problems_count"): len(known_problems),
+            t("student_review_length"): _line_count(student_review)
+        }
+        
+        try:
+            if isinstance(response, Exception):
+                raise response
+            # Streamed replies are already plain text
+            if analysis_data is None:
                 processed_response = process_llm_response(response)
+            else:
+                processed_response = response
 
-                # Log the interaction
-                self.llm_logger.log_review_analysis(prompt, processed_response, metadata)
-                
-                # Make sure we have a response
-                if not response:
-                    logger.error(t("empty_response_from_llm"))
-                    return ""
-                
-                # Extract JSON data from the response
-                analysis_data = self._extract_json_from_text(processed_response)   
-                # Process the analysis data
-                enhanced_analysis = self._process_enhanced_analysis(analysis_data, known_problems)               
-                return enhanced_analysis
-                
-            except Exception as e:
-                logger.error(f"{t('error')} {t('evaluating_review_with_llm')}: {str(e)}")                
-                # Log the error
-                error_metadata = {**metadata, "error": str(e)}
-                self.llm_logger.log_review_analysis(prompt, f"{t('error')}: {str(e)}", error_metadata)                
+            # Log the interaction
+            self.llm_logger.log_review_analysis(prompt, processed_response, metadata)
+            
+            # Make sure we have a response
+            if not response:
+                logger.error(t("empty_response_from_llm"))
                 return ""
             
+            # Extract JSON data from the response unless it was already parsed
+            if analysis_data is None:
+                analysis_data, extracted = self._extract_json_from_text(processed_response)   
+            else:
+                extracted = True
+            # Process the analysis data
+            enhanced_analysis = self._process_enhanced_analysis(analysis_data, known_problems)               
+            
+            # Only analyses the LLM actually produced are worth reusing;
+            # a failed extraction must stay retryable
+            if cache_key is not None and extracted and enhanced_analysis:
+                self._cache_evaluation(cache_key, enhanced_analysis)
+            return enhanced_analysis
+            
         except Exception as e:
-            logger.error(f"{t('exception_in_evaluate_review')}: {str(e)}")
+            logger.error(f"{k['error']} {t('evaluating_review_with_llm')}: {str(e)}")                
+            # Log the error
+            error_metadata = {**metadata, "error": str(e)}
+            self.llm_logger.log_review_analysis(prompt, f"{k['error']}: {str(e)}", error_metadata)                
             return ""
             
     def _process_enhanced_analysis(self, analysis_data: Dict[str, Any], known_problems: List[str]) -> Dict[str, Any]:
@@ -125,22 +591,18 @@ class StudentResponseEvaluator:
         Returns:
             Enhanced analysis data
         """
+        k = _analysis_keys(get_current_language())
 
         if not analysis_data:
             return ""
         
         # Extract core metrics with defaults
-        identified_count = analysis_data.get(f"{t('identified_count')}",0)
-        total_problems = analysis_data.get(f"{t('total_problems')}",len(known_problems))
+        identified_count = analysis_data.get(k["identified_count"],0)
+        total_problems = analysis_data.get(k["total_problems"],len(known_problems))
 
         # Track meaningful comments separately
-        identified_problems = analysis_data.get(f"{t('identified_problems')}", [])
-
-        # Calculate percentages
-        if total_problems > 0:
-            identified_percentage = (identified_count / total_problems) * 100
-        else:
-            identified_percentage = 100.0
+        identified_problems = analysis_data.get(k["identified_problems"], [])
+        missed_problems = analysis_data.get(k["missed_problems"], [])
 
         # Calculate percentages
         if total_problems > 0:
@@ -149,23 +611,21 @@ class StudentResponseEvaluator:
             identified_percentage = 100.0
 
         # Check if review is sufficient based on meaningful comments
-        review_sufficient = analysis_data.get(f"{'review_sufficient'}", False)
-        identified_problems =  analysis_data.get(f"{t('identified_problems')}", False)
-        missed_problems = analysis_data.get(f"{t('missed_problems')}", False)
+        review_sufficient = analysis_data.get("review_sufficient", False)
         
         # Construct enhanced result using t() function for keys
         enhanced_result = {
-            t("identified_problems"): identified_problems,
-            t("missed_problems"): missed_problems,
-            t("identified_count"): identified_count,
-            t("total_problems"): total_problems,
-            t("identified_percentage"): identified_percentage,
-            t("review_sufficient"): review_sufficient
+            k["identified_problems"]: identified_problems,
+            k["missed_problems"]: missed_problems,
+            k["identified_count"]: identified_count,
+            k["total_problems"]: total_problems,
+            k["identified_percentage"]: identified_percentage,
+            k["review_sufficient"]: review_sufficient
         }
         
         return enhanced_result
          
-    def _extract_json_from_text(self, text: str) -> Dict[str, Any]:
+    def _extract_json_from_text(self, text: str) -> Tuple[Dict[str, Any], bool]:
         """
         Extract JSON data from LLM response text with improved robustness for malformed responses.
         
@@ -173,179 +633,98 @@ class StudentResponseEvaluator:
             text: Text containing JSON data
             
         Returns:
-            Extracted JSON data
+            Tuple of (extracted JSON data, whether any analysis field actually
+            came from the text rather than from defaults)
         """
+        k = _analysis_keys(get_current_language())
         # Handle None or empty text
         if not text:
-            return {t("error"): t("empty_response_from_llm")}
+            return {k["error"]: t("empty_response_from_llm")}, False
         
         try:
-            # First try direct JSON parsing if the response looks like JSON
-            if text.strip().startswith('{') and text.strip().endswith('}'):
-                try:
-                    # Clean the response to fix common JSON issues
-                    json_str = text.strip()
-                    # Fix trailing commas which are invalid in JSON
-                    json_str = re.sub(r',\s*}', '}', json_str)
-                    json_str = re.sub(r',\s*]', ']', json_str)
-                    # Try to parse as JSON directly
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    # If direct parsing fails, continue with regex extraction
-                    pass
+            # Well-formed responses parse directly
+            try:
+                parsed = _json_loads(text)
+            except json.JSONDecodeError:
+                parsed = None
+            
+            # Otherwise repair the outermost object: cut it out by bracket
+            # matching and drop trailing commas, which are invalid in JSON
+            if not isinstance(parsed, dict):
+                json_str = find_json_object(text)
+                if json_str is not None:
+                    try:
+                        parsed = loads_lenient(json_str, _json_loads)
+                    except json.JSONDecodeError:
+                        # If repair fails, continue with regex extraction
+                        parsed = None
+            
+            if isinstance(parsed, dict):
+                return _localize_analysis_keys(parsed), True
                     
             # For the specific broken format in the example
             # Look for key JSON fields and try to reconstruct a valid JSON
-            identified_problems_match = re.search(r'"(已識別的問題|Identified Problems)"\s*:\s*\[(.*?)\]', text, re.DOTALL)
+            identified_problems_match = _IDENT_PROBLEMS_RE.search(text)
             
             # Fallback manual extraction when JSON is severely malformed
             analysis = {}
             
             # Extract identified problems with either Chinese or English field names
             if identified_problems_match:
-                identified_problems_text = identified_problems_match.group(2)
-                # Try to extract individual problem objects
-                problem_objects = []
-                current_problem = {}
-                lines = identified_problems_text.strip().split('\n')
-                
-                for line in lines:
-                    line = line.strip()
-                    
-                    # Skip empty lines or just containing brackets/braces
-                    if not line or line in ['{', '}', '[', ']']:
-                        continue
-                    
-                    # Check for key-value pairs
-                    key_value_match = re.search(r'"([^"]+)"\s*:\s*(.+)', line)
-                    if key_value_match:
-                        key = key_value_match.group(1)
-                        value = key_value_match.group(2).strip()
-                        
-                        # Remove trailing comma if present
-                        if value.endswith(','):
-                            value = value[:-1].strip()
-                        
-                        # Handle string values (quoted)
-                        if value.startswith('"') and value.endswith('"'):
-                            current_problem[key] = value[1:-1]
-                        # Handle numeric values
-                        elif value.replace('.', '', 1).isdigit():
-                            current_problem[key] = float(value) if '.' in value else int(value)
-                        # Handle boolean values
-                        elif value.lower() in ['true', 'false']:
-                            current_problem[key] = value.lower() == 'true'
-                        else:
-                            current_problem[key] = value
-                    
-                    # If we see a closing brace, add the current problem to the list
-                    if '}' in line and current_problem:
-                        problem_objects.append(current_problem)
-                        current_problem = {}
-                
-                # Add any remaining problem
-                if current_problem:
-                    problem_objects.append(current_problem)
-                    
-                # Add the extracted problems to the analysis
-                analysis[t("identified_problems")] = problem_objects
+                analysis[k["identified_problems"]] = _parse_problem_array(identified_problems_match.group(2))
             
             # Extract other fields similarly (missed problems, counts, etc.)
             # Example for identified count
-            identified_count_match = re.search(r'"(已識別數量|Identified Count)"\s*:\s*(\d+)', text)
+            identified_count_match = _COUNT_RE.search(text)
             if identified_count_match:
-                analysis[t("identified_count")] = int(identified_count_match.group(2))
+                analysis[k["identified_count"]] = int(identified_count_match.group(2))
                 
             # Example for total problems
-            total_problems_match = re.search(r'"(總問題數|Total Problems)"\s*:\s*(\d+)', text)
+            total_problems_match = _TOTAL_RE.search(text)
             if total_problems_match:
-                analysis[t("total_problems")] = int(total_problems_match.group(2))
+                analysis[k["total_problems"]] = int(total_problems_match.group(2))
                 
             # Example for identified percentage
-            percentage_match = re.search(r'"(識別百分比|Identified Percentage)"\s*:\s*([0-9.]+)', text)
+            percentage_match = _PCT_RE.search(text)
             if percentage_match:
-                analysis[t("identified_percentage")] = float(percentage_match.group(2))
+                analysis[k["identified_percentage"]] = float(percentage_match.group(2))
                 
             # Example for review sufficient
-            sufficient_match = re.search(r'"(審查足夠|Review Sufficient)"\s*:\s*(true|false)', text, re.IGNORECASE)
+            sufficient_match = _SUFFICIENT_RE.search(text)
             if sufficient_match:
-                analysis[t("review_sufficient")] = sufficient_match.group(2).lower() == "true"
+                analysis[k["review_sufficient"]] = sufficient_match.group(2).lower() == "true"
             
             # Try to extract missed problems array separately
-            missed_problems_match = re.search(r'"(遺漏的問題|Missed Problems)"\s*:\s*\[(.*?)\]', text, re.DOTALL)
+            missed_problems_match = _MISSED_RE.search(text)
             if missed_problems_match:
-               
-                # Parse the missed_text to extract problem objects
-                #analysis[t("missed_problems")] = missed_problems
-                missed_text = missed_problems_match.group(2).strip()
-                missed_problems = []
-                current_problem = {}
-                lines = missed_text.strip().split('\n')
-
-                for line in lines:
-                    line = line.strip()
-                    # Skip empty lines or just containing brackets/braces
-                    if not line or line in ['{', '}', '[', ']']:
-                        continue
-                    
-                    # Check for key-value pairs
-                    key_value_match = re.search(r'"([^"]+)"\s*:\s*(.+)', line)
-                    if key_value_match:
-                        key = key_value_match.group(1)
-                        value = key_value_match.group(2).strip()
-                        
-                        # Remove trailing comma if present
-                        if value.endswith(','):
-                            value = value[:-1].strip()
-                        
-                        # Handle string values (quoted)
-                        if value.startswith('"') and value.endswith('"'):
-                            current_problem[key] = value[1:-1]
-                        # Handle numeric values
-                        elif value.replace('.', '', 1).isdigit():
-                            current_problem[key] = float(value) if '.' in value else int(value)
-                        # Handle boolean values
-                        elif value.lower() in ['true', 'false']:
-                            current_problem[key] = value.lower() == 'true'
-                        else:
-                            current_problem[key] = value
-                    
-                    # If we see a closing brace, add the current problem to the list
-                    if '}' in line and current_problem:
-                        missed_problems.append(current_problem)
-                        current_problem = {}
-
-                # Add any remaining problem
-                if current_problem:
-                    missed_problems.append(current_problem)
-                
-                # Add the parsed missed problems to the analysis
-                analysis[t("missed_problems")] = missed_problems
-            else:
-                analysis[t("missed_problems")] = []
+                analysis[k["missed_problems"]] = _parse_problem_array(missed_problems_match.group(2))
+            
+            # Defaults do not count as extracted fields
+            extracted = bool(analysis)
+            analysis.setdefault(k["missed_problems"], [])
             
             # If we extracted enough fields to form a valid analysis, return it
-            if t("identified_problems") in analysis or t("missed_problems") in analysis:
-                return analysis
+            if k["identified_problems"] in analysis or k["missed_problems"] in analysis:
+                return analysis, extracted
                 
             # If all else fails, return a minimal valid structure
             logger.warning(t("could_not_extract_json_from_response"))
             return {
-                t("identified_problems"): [],
-                t("missed_problems"): [],
-                t("identified_count"): 0,
-                t("total_problems"): 0,
-                t("identified_percentage"): 0,
-                t("review_sufficient"): False,
-                t("feedback"): t("analysis_could_not_extract_feedback")
-            }
+                k["identified_problems"]: [],
+                k["missed_problems"]: [],
+                k["identified_count"]: 0,
+                k["total_problems"]: 0,
+                k["identified_percentage"]: 0,
+                k["review_sufficient"]: False,
+                k["feedback"]: t("analysis_could_not_extract_feedback")
+            }, False
             
         except Exception as e:
             logger.error(f"{t('error_extracting_json')}: {str(e)}")
             return {
-                t("error"): f"{t('error_extracting_json')}: {str(e)}",
-                t("raw_text"): text[:500] + ("..." if len(text) > 500 else "")
-            }
+                k["error"]: f"{t('error_extracting_json')}: {str(e)}",
+                k["raw_text"]: text[:500] + ("..." if len(text) > 500 else "")
+            }, False
 
     def generate_targeted_guidance(self, code_snippet: str, known_problems: List[str], student_review: str, review_analysis: Dict[str, Any], iteration_count: int, max_iterations: int) -> str:
         """
@@ -367,75 +746,157 @@ class StudentResponseEvaluator:
             logger.warning(t("no_llm_provided_for_guidance"))
             return ""
         
+        prompt = None
         try:
-            # Get iteration information to add to review_analysis for context
-            review_context = review_analysis.copy()
-            review_context.update({
-                t("iteration_count"): iteration_count,
-                t("max_iterations"): max_iterations,
-                t("remaining_attempts"): max_iterations - iteration_count
-            })
-
-            identified_count = review_context.get(t("identified_count"), 0)
-
-            # Use the utility function to create the prompt
-            prompt = create_feedback_prompt(
-                code=code_snippet,
-                known_problems=known_problems,
-                review_analysis=review_context
+            prompt, metadata = self._build_guidance_prompt(
+                code_snippet, known_problems, review_analysis, iteration_count, max_iterations
             )
-
-            #prompt += "\n\nIMPORTANT: Focus on helping the student make more meaningful comments. A good comment should clearly explain WHAT the issue is and WHY it's a problem, not just identify where it is. For example, instead of just 'Line 11: null issue', guide them to write 'Line 11: Object is accessed before null check, which could cause NullPointerException'."
-
-            metadata = {
-                t("iteration"): iteration_count,
-                t("max_iterations"): max_iterations,
-                t("identified_count"):  review_analysis[t('identified_count')],
-                t("total_problems"): review_analysis[t('total_problems')],
-                t("accuracy_percentage"): review_analysis[t('accuracy_percentage')]
-            }
-
             logger.debug(t("generating_concise_targeted_guidance").format(iteration_count=iteration_count))
             response = self.llm.invoke(prompt)
-            guidance = process_llm_response(response)
-            
+            return self._finish_guidance(prompt, response, metadata)
+        except Exception as e:
+            return self._guidance_failed(prompt, e, review_analysis, iteration_count, max_iterations)
+    
+    async def agenerate_targeted_guidance(self, code_snippet: str, known_problems: List[str], student_review: str, review_analysis: Dict[str, Any], iteration_count: int, max_iterations: int) -> str:
+        """
+        Async variant of generate_targeted_guidance.
+        
+        Args:
+            code_snippet: The original code snippet with injected errors
+            known_problems: List of known problems in the code
+            student_review: The student's review comments
+            review_analysis: Analysis of the student review
+            iteration_count: Current iteration number
+            max_iterations: Maximum number of iterations
             
-            # Ensure response is concise - trim if needed
-            if len(guidance.split()) > 100:
-                # Split into sentences and take the first 3-4
-                sentences = re.split(r'(?<=[.!?])\s+', guidance)
-                guidance = ' '.join(sentences[:4])
-                logger.debug(t("trimmed_guidance_words").format(
-                    before=len(guidance.split()), 
-                    after=len(guidance.split())
-                ))
+        Returns:
+            Targeted guidance text
+        """
+        if not self.llm:
+            logger.warning(t("no_llm_provided_for_guidance"))
+            return ""
+        
+        prompt = None
+        try:
+            prompt, metadata = self._build_guidance_prompt(
+                code_snippet, known_problems, review_analysis, iteration_count, max_iterations
+            )
+            logger.debug(t("generating_concise_targeted_guidance").format(iteration_count=iteration_count))
+            response = await self.llm.ainvoke(prompt)
+            return await _to_thread_in_language(self._finish_guidance, prompt, response, metadata)
+        except Exception as e:
+            return await _to_thread_in_language(
+                self._guidance_failed, prompt, e, review_analysis, iteration_count, max_iterations
+            )
+    
+    def _build_guidance_prompt(self, code_snippet: str, known_problems: List[str], review_analysis: Dict[str, Any],
+                               iteration_count: int, max_iterations: int) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build the targeted guidance prompt and its logging metadata.
+        
+        Args:
+            code_snippet: The original code snippet with injected errors
+            known_problems: List of known problems in the code
+            review_analysis: Analysis of the student review
+            iteration_count: Current iteration number
+            max_iterations: Maximum number of iterations
             
-            # Log the interaction
-            self.llm_logger.log_summary_generation(prompt, guidance, metadata)            
-            return guidance
+        Returns:
+            Tuple of (prompt, metadata)
+        """
+        k = _analysis_keys(get_current_language())
+        # Get iteration information to add to review_analysis for context
+        review_context = review_analysis.copy()
+        review_context.update({
+            k["iteration_count"]: iteration_count,
+            k["max_iterations"]: max_iterations,
+            k["remaining_attempts"]: max_iterations - iteration_count
+        })
+
+        # Use the utility function to create the prompt
+        prompt = create_feedback_prompt(
+            code=code_snippet,
+            known_problems=known_problems,
+            review_analysis=review_context
+        )
+
+        metadata = {
+            t("iteration"): iteration_count,
+            k["max_iterations"]: max_iterations,
+            k["identified_count"]:  review_analysis[k["identified_count"]],
+            k["total_problems"]: review_analysis[k["total_problems"]],
+            k["accuracy_percentage"]: review_analysis[k["accuracy_percentage"]]
+        }
+        return prompt, metadata
+    
+    def _finish_guidance(self, prompt: str, response: Any, metadata: Dict[str, Any]) -> str:
+        """
+        Clean up, trim and log an LLM guidance response.
+        
+        Args:
+            prompt: Prompt sent to the LLM
+            response: LLM response
+            metadata: Logging metadata from _build_guidance_prompt
             
-        except Exception as e:
-            logger.error(f"{t('error_generating_guidance')}: {str(e)}")            
+        Returns:
+            Targeted guidance text
+        """
+        guidance = process_llm_response(response)
+        
+        # Ensure response is concise - trim if needed
+        if len(guidance.split()) > 100:
+            # Split into sentences and take the first 3-4
+            sentences = _SENTENCE_END_RE.split(guidance)
+            guidance = ' '.join(sentences[:4])
+            logger.debug(t("trimmed_guidance_words").format(
+                before=len(guidance.split()), 
+                after=len(guidance.split())
+            ))
+        
+        # Log the interaction
+        self.llm_logger.log_summary_generation(prompt, guidance, metadata)            
+        return guidance
+    
+    def _guidance_failed(self, prompt: Optional[str], error: Exception, review_analysis: Dict[str, Any],
+                         iteration_count: int, max_iterations: int) -> str:
+        """
+        Log a failed guidance generation.
+        
+        Args:
+            prompt: Prompt that was sent, if it was built
+            error: The exception raised
+            review_analysis: Analysis of the student review
+            iteration_count: Current iteration number
+            max_iterations: Maximum number of iterations
             
+        Returns:
+            Empty guidance
+        """
+        k = _analysis_keys(get_current_language())
+        logger.error(f"{t('error_generating_guidance')}: {str(error)}")            
+        
+        try:
             # Create error metadata with translated keys
             error_metadata = {
                 t("iteration"): iteration_count,
-                t("max_iterations"): max_iterations,
-                t("identified_count"): review_analysis[t('identified_count')],
-                t("total_problems"): review_analysis[t('total_problems')],
-                t("error"): str(e)
+                k["max_iterations"]: max_iterations,
+                k["identified_count"]: review_analysis[k["identified_count"]],
+                k["total_problems"]: review_analysis[k["total_problems"]],
+                k["error"]: str(error)
             }
             
             # Log the error
             self.llm_logger.log_interaction(
                 t('targeted_guidance'), 
                 prompt,
-                f"{t('error')}: {str(e)}", 
+                f"{k['error']}: {str(error)}", 
                 error_metadata
             )
-                
-            # Fallback to concise guidance
-            return ""
+        except Exception as e:
+            logger.error(f"{t('error_generating_guidance')}: {str(e)}")
+            
+        # Fallback to concise guidance
+        return ""
         
     def validate_review_format(self, student_review: str) -> Tuple[bool, str]:
         """
@@ -451,16 +912,8 @@ class StudentResponseEvaluator:
         if not student_review or not student_review.strip():
             return False, t("review_cannot_be_empty")
         
-        # Check if the review has at least one line that follows the expected format
-        # Expected format: "Line X: Description of issue"
-        valid_line_pattern = re.compile(r'(?:Line|行)\s*\d+\s*[:：]')
-        
-        # Split the review into lines and check each line
-        lines = student_review.strip().split('\n')
-        valid_lines = [i+1 for i, line in enumerate(lines) if valid_line_pattern.search(line)]
-        
-        # If we have at least one valid line, the review is valid
-        if valid_lines:
+        # The review is valid as soon as one line follows the expected format
+        if _VALID_LINE_RE.search(student_review):
             return True, ""
         
         # Otherwise, return a validation error
@@ -492,28 +945,65 @@ class StudentResponseEvaluator:
             # Generate the report with the LLM
             response = self.llm.invoke(prompt)
             
-            # Process the response
-            if hasattr(response, 'content'):
-                report = response.content
-            elif isinstance(response, dict) and 'content' in response:
-                report = response['content']
-            else:
-                report = str(response)
+            return self._finish_comparison_report(prompt, response, evaluation_errors, review_analysis, review_history)
+        except Exception as e:
+            # Log the error
+            logger.error(f"Error generating comparison report with LLM: {str(e)}")
+            # Return an empty string
+            return ""
+    
+    async def agenerate_comparison_report(self, evaluation_errors: List[str], review_analysis: Dict[str, Any], 
+                                          review_history: List[Dict[str, Any]] = None) -> str:
+        """
+        Async variant of generate_comparison_report.
+        
+        Args:
+            evaluation_errors: List of errors found by the evaluation
+            review_analysis: Analysis of the latest student review
+            review_history: History of all review attempts
             
-            # Clean up the report
-            report = report.replace('\\n', '\n')
+        Returns:
+            Formatted comparison report
+        """
+        try:
+            if not self.llm:
+                logger.error(f"{t('error')} generating comparison report: No LLM available")
+                return ""
             
-            # Log the report generation
-            self.llm_logger.log_interaction("comparison_report", prompt, report, {
-                t("evaluation_errors_count"): len(evaluation_errors),
-                t("review_analysis"): review_analysis,
-                t("review_history_count"): len(review_history) if review_history else 0
-            })
+            prompt = create_comparison_report_prompt(evaluation_errors, review_analysis, review_history)
+            response = await self.llm.ainvoke(prompt)
             
-            return report
+            # Log file writes run off the event loop
+            return await _to_thread_in_language(
+                self._finish_comparison_report, prompt, response, evaluation_errors, review_analysis, review_history
+            )
         except Exception as e:
-            # Log the error
             logger.error(f"Error generating comparison report with LLM: {str(e)}")
-            # Return an empty string
             return ""
-    
\ No newline at end of file
+    
+    def _finish_comparison_report(self, prompt: str, response: Any, evaluation_errors: List[str],
+                                  review_analysis: Dict[str, Any], review_history: Optional[List[Dict[str, Any]]]) -> str:
+        """
+        Clean up and log an LLM comparison report response.
+        
+        Args:
+            prompt: Prompt sent to the LLM
+            response: LLM response
+            evaluation_errors: List of errors found by the evaluation
+            review_analysis: Analysis of the latest student review
+            review_history: History of all review attempts
+            
+        Returns:
+            Formatted comparison report
+        """
+        # Extract and clean up the report text, including escaped newlines
+        report = process_llm_response(response)
+        
+        # Log the report generation
+        self.llm_logger.log_interaction("comparison_report", prompt, report, {
+            t("evaluation_errors_count"): len(evaluation_errors),
+            t("review_analysis"): review_analysis,
+            t("review_history_count"): len(review_history) if review_history else 0
+        })
+        
+        return report
@@ -1,11 +1,16 @@
 # db/mysql_connection.py
 import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
 import logging
+import threading
 import time
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 import traceback
+from collections import OrderedDict
+from contextlib import contextmanager
 
 # Load environment variables
 load_dotenv()
@@ -23,19 +28,36 @@ class MySQLConnection:
     """
     
     _instance = None
+    _instance_lock = threading.Lock()
+    
+    # Prepared statements kept per pooled connection; least recently used are closed first
+    MAX_PREPARED_STATEMENTS = 128
+    # Server gone away / lost connection during query / lost connection
+    _CONNECTION_LOST_ERRORS = frozenset((2006, 2013, 2055))
     
     def __new__(cls):
         """Ensure singleton instance."""
+        # Double-checked locking so concurrent first use cannot build two pools
         if cls._instance is None:
-            cls._instance = super(MySQLConnection, cls).__new__(cls)
-            cls._instance._initialized = False
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(MySQLConnection, cls).__new__(cls)
+                    instance._initialized = False
+                    cls._instance = instance
         return cls._instance
     
     def __init__(self):
         """Initialize the database connection."""
         if self._initialized:
             return
-            
+        
+        with self._instance_lock:
+            if self._initialized:
+                return
+            self._setup()
+    
+    def _setup(self):
+        """Read the configuration and prepare the pool; runs once under the instance lock."""
         # Get database configuration from environment variables
         self.db_host = os.getenv("DB_HOST", "localhost")
         self.db_user = os.getenv("DB_USER", "java_review_user")
@@ -43,37 +65,146 @@ class MySQLConnection:
         self.db_name = os.getenv("DB_NAME", "java_review_db")
         self.db_port = int(os.getenv("DB_PORT", "3306"))
         
-        # Initialize connection to None
-        self.connection = None
-        self._initialized = True
+        # Pool shared by all sessions; mysql.connector caps pools at 32 connections
+        self.pool_size = min(int(os.getenv("DB_POOL_SIZE", "16")), pooling.CNX_POOL_MAXSIZE)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        
+        # Extra short-lived connections allowed while the pool is exhausted;
+        # beyond that, callers wait up to pool_timeout seconds for a free one
+        self.max_overflow = int(os.getenv("DB_POOL_OVERFLOW", "8"))
+        self.pool_timeout = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+        self._overflow_slots = threading.BoundedSemaphore(self.max_overflow)
+        
+        # Connection bound to the current thread by transaction()
+        self._local = threading.local()
         
         # Create database and tables if they don't exist
         self._initialize_database()
+        
+        # Set last, so other threads only skip setup once it has finished
+        self._initialized = True
+    
+    def _connection_config(self) -> Dict[str, Any]:
+        """Connection arguments shared by the pool and overflow connections."""
+        return {
+            "host": self.db_host,
+            "user": self.db_user,
+            "password": self.db_password,
+            "database": self.db_name,
+            "port": self.db_port,
+            "auth_plugin": 'mysql_native_password',  # Try alternative auth method
+            "use_pure": True,  # Use pure Python implementation for better compatibility
+            # Each statement commits on its own, so pooled connections never
+            # hold an open read snapshot between uses
+            "autocommit": True
+        }
+    
+    def _get_pool(self) -> pooling.MySQLConnectionPool:
+        """Create the connection pool on first use."""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    logger.debug(f"Creating MySQL pool ({self.pool_size}): {self.db_user}@{self.db_host}:{self.db_port}/{self.db_name}")
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name="java_review_pool",
+                        pool_size=self.pool_size,
+                        pool_reset_session=False,
+                        **self._connection_config()
+                    )
+        return self._pool
     
     def _get_connection(self):
-        """Get a database connection with improved error handling."""
+        """
+        Get a database connection from the pool with improved error handling.
+        
+        Closing the returned connection hands it back to the pool.
+        """
+        deadline = time.monotonic() + self.pool_timeout
         try:
-            if self.connection is None or not self.connection.is_connected():
-                # Log connection attempt
-                logger.debug(f"Connecting to MySQL: {self.db_user}@{self.db_host}:{self.db_port}/{self.db_name}")
+            while True:
+                try:
+                    return self._get_pool().get_connection()
+                except PoolError:
+                    pass
+                
+                # Pool exhausted: serve the query with a short-lived connection
+                # while overflow slots remain, otherwise wait for one to free up
+                if self._overflow_slots.acquire(blocking=False):
+                    logger.debug("MySQL pool exhausted, opening an overflow connection")
+                    try:
+                        connection = mysql.connector.connect(**self._connection_config())
+                    except BaseException:
+                        self._overflow_slots.release()
+                        raise
+                    connection._overflow = True
+                    return connection
                 
-                # Add authentication_plugin parameter for compatibility
-                self.connection = mysql.connector.connect(
-                    host=self.db_host,
-                    user=self.db_user,
-                    password=self.db_password,
-                    database=self.db_name,
-                    port=self.db_port,
-                    auth_plugin='mysql_native_password',  # Try alternative auth method
-                    use_pure=True  # Use pure Python implementation for better compatibility
-                )
-                logger.debug("Connected to MySQL successfully")
-            return self.connection
+                if time.monotonic() >= deadline:
+                    logger.error("MySQL pool and overflow connections exhausted")
+                    return None
+                time.sleep(0.05)
         except mysql.connector.Error as e:
             logger.error(f"Error connecting to MySQL: {str(e)}")
             logger.error(traceback.format_exc())
             return None
     
+    def _checkout(self):
+        """
+        Get the connection for the next statement.
+        
+        Returns:
+            Tuple of (connection, owned); owned connections must be released by the caller,
+            while the one bound by transaction() stays checked out until it ends
+        """
+        bound = getattr(self._local, "connection", None)
+        if bound is not None:
+            return bound, False
+        return self._get_connection(), True
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Run every query issued by this thread inside the block on one connection and one transaction.
+        
+        The transaction commits when the block exits normally and rolls back if
+        it raises. Most query methods still swallow their own errors, so a
+        failed statement does not undo the others. A failed prepared statement
+        is the exception: the server may already have rolled the transaction
+        back (deadlock, lock wait timeout), so execute_prepared() re-raises and
+        the whole block rolls back and re-raises the error even if a caller
+        caught it. Nested blocks join the outer one.
+        """
+        if getattr(self._local, "connection", None) is not None:
+            yield
+            return
+        
+        connection = self._get_connection()
+        if not connection:
+            # Queries fall back to their own connections
+            logger.error("Failed to get database connection for transaction")
+            yield
+            return
+        
+        self._local.connection = connection
+        self._local.error = None
+        try:
+            connection.start_transaction()
+            yield
+            if self._local.error is not None:
+                raise self._local.error
+            connection.commit()
+        except Exception:
+            try:
+                connection.rollback()
+            except mysql.connector.Error as e:
+                logger.debug(f"Error rolling back transaction: {str(e)}")
+            raise
+        finally:
+            self._local.connection = None
+            self._local.error = None
+            self._release_connection(connection)
+    
     def _initialize_database(self):
         """Create the database and tables if they don't exist."""
         try:
@@ -114,7 +245,7 @@ class MySQLConnection:
         retry_count = 0
         
         while retry_count < max_retries:
-            connection = self._get_connection()
+            connection, owned = self._checkout()
             if not connection:
                 logger.error("Failed to get database connection")
                 time.sleep(1)  # Wait before retry
@@ -133,7 +264,7 @@ class MySQLConnection:
                 
                 cursor.execute(query, params or ())
                 
-                if query.strip().upper().startswith(("SELECT", "SHOW")):
+                if query.strip().upper().startswith(("SELECT", "SHOW", "WITH")):
                     if fetch_one:
                         result = cursor.fetchone()
                     else:
@@ -141,7 +272,7 @@ class MySQLConnection:
                     cursor.close()
                     return result
                 else:
-                    connection.commit()
+                    # Committed by autocommit
                     affected_rows = cursor.rowcount
                     cursor.close()
                     logger.debug(f"Query executed successfully. Affected rows: {affected_rows}")
@@ -156,7 +287,6 @@ class MySQLConnection:
                 should_retry = False
                 if "2006" in str(e) or "2013" in str(e):  # Common MySQL connection lost error codes
                     logger.debug("Connection lost, attempting to reconnect...")
-                    self.connection = None  # Force reconnection
                     should_retry = True
                 
                 if should_retry and retry_count < max_retries - 1:
@@ -168,4 +298,236 @@ class MySQLConnection:
             except Exception as e:
                 logger.error(f"Unexpected error executing query: {str(e)}")
                 #logger.error(traceback.format_exc())
-                return None
\ No newline at end of file
+                return None
+            finally:
+                if owned:
+                    self._release_connection(connection)
+    
+    def iter_query(self, query: str, params: tuple = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the rows of a SELECT without loading the whole result set.
+        
+        The connection stays checked out until the generator is exhausted or closed.
+        
+        Args:
+            query: SQL with %s placeholders
+            params: Query parameters
+            
+        Yields:
+            Row dictionaries
+        """
+        connection = self._get_connection()
+        if not connection:
+            logger.error("Failed to get database connection")
+            return
+        
+        try:
+            # Unbuffered: rows are read from the server as they are consumed
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            logger.debug(f"Streaming query: {query} with params: {params}")
+            cursor.execute(query, params or ())
+            for row in cursor:
+                yield row
+            cursor.close()
+        except mysql.connector.Error as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            logger.error(f"Query: {query}")
+        finally:
+            try:
+                # Discard rows left unread by an early exit so the connection is reusable
+                connection.consume_results()
+            except mysql.connector.Error:
+                pass
+            self._release_connection(connection)
+    
+    def execute_prepared(self, query: str, params: tuple = None, fetch_one: bool = False):
+        """
+        Execute a hot query as a server-side prepared statement.
+        
+        The statement is prepared once per pooled connection and reused, so
+        repeated calls skip SQL parsing and use the binary protocol.
+        
+        Args:
+            query: SQL with %s placeholders
+            params: Query parameters
+            fetch_one: Return only the first row for SELECT queries
+            
+        Returns:
+            Row dictionaries for SELECT queries, affected rows otherwise, or None on error
+            
+        Raises:
+            mysql.connector.Error: If the statement fails inside transaction()
+        """
+        connection, owned = self._checkout()
+        if not connection:
+            logger.error("Failed to get database connection")
+            return None
+        
+        # Pooled connections wrap the raw connection, which outlives each checkout
+        raw_connection = getattr(connection, "_cnx", connection)
+        prepared_cursors = raw_connection.__dict__.setdefault("_prepared_cursors", OrderedDict())
+        
+        try:
+            for attempt in range(2):
+                try:
+                    return self._run_prepared(raw_connection, prepared_cursors, query, params, fetch_one)
+                except mysql.connector.Error as e:
+                    # Statement handles do not survive a reconnect; prepare again
+                    self._discard_prepared(prepared_cursors)
+                    if attempt == 0 and self._can_retry_prepared(raw_connection, e, owned):
+                        logger.debug(f"Re-preparing statement after error: {str(e)}")
+                        continue
+                    logger.error(f"Error executing prepared query: {str(e)}")
+                    logger.error(f"Query: {query}")
+                    if not owned:
+                        # Let transaction() roll back the statements before this one
+                        self._local.error = e
+                        raise
+                    return None
+        except mysql.connector.Error:
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error executing prepared query: {str(e)}")
+            self._discard_prepared(prepared_cursors)
+            return None
+        finally:
+            if owned:
+                self._release_connection(connection)
+    
+    def _run_prepared(self, raw_connection, prepared_cursors: "OrderedDict[str, Any]", query: str,
+                      params: tuple, fetch_one: bool):
+        """
+        Execute a query with the connection's cached prepared cursor, preparing it if needed.
+        
+        Args:
+            raw_connection: Connection owning the prepared statements
+            prepared_cursors: The connection's cursors by query, least recently used first
+            query: SQL with %s placeholders
+            params: Query parameters
+            fetch_one: Return only the first row for SELECT queries
+            
+        Returns:
+            Row dictionaries for SELECT queries, affected rows otherwise
+        """
+        cursor = prepared_cursors.get(query)
+        if cursor is None:
+            cursor = raw_connection.cursor(prepared=True)
+            prepared_cursors[query] = cursor
+            if len(prepared_cursors) > self.MAX_PREPARED_STATEMENTS:
+                # Closing the cursor deallocates its statement on the server
+                _, evicted = prepared_cursors.popitem(last=False)
+                evicted.close()
+        else:
+            prepared_cursors.move_to_end(query)
+        
+        logger.debug(f"Executing prepared query: {query} with params: {params}")
+        cursor.execute(query, params or ())
+        
+        if cursor.with_rows:
+            columns = cursor.column_names
+            if fetch_one:
+                row = cursor.fetchone()
+                # Drain the rest so the cursor can be executed again
+                cursor.fetchall()
+                return dict(zip(columns, row)) if row else None
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        
+        return cursor.rowcount
+    
+    @staticmethod
+    def _discard_prepared(prepared_cursors: "OrderedDict[str, Any]") -> None:
+        """Close and forget a connection's prepared cursors."""
+        for cursor in prepared_cursors.values():
+            try:
+                cursor.close()
+            except Exception:
+                # The handle may already be gone with the old session
+                pass
+        prepared_cursors.clear()
+    
+    def _can_retry_prepared(self, raw_connection, error: mysql.connector.Error, owned: bool) -> bool:
+        """
+        Decide whether a failed prepared statement is worth one more attempt.
+        
+        Most failures, such as stale statement handles after a reconnect, are
+        retried once the statement is prepared again. Integrity and data
+        errors would only fail again. Nothing is retried inside transaction():
+        a deadlock or lost connection has already discarded the earlier
+        statements, so running this one again would commit half the block.
+        
+        Args:
+            raw_connection: Connection the statement ran on
+            error: The error raised
+            owned: Whether the connection was checked out for this call only
+            
+        Returns:
+            True if the statement should be run again
+        """
+        if not owned:
+            return False
+        if isinstance(error, (mysql.connector.IntegrityError, mysql.connector.DataError)):
+            return False
+        if error.errno in self._CONNECTION_LOST_ERRORS:
+            try:
+                raw_connection.reconnect(attempts=1, delay=0)
+            except mysql.connector.Error as e:
+                logger.debug(f"Reconnect failed: {str(e)}")
+                return False
+        return True
+    
+    def call_procedure(self, name: str, args: tuple = ()) -> Optional[List[Dict[str, Any]]]:
+        """
+        Call a stored procedure in a single round trip and commit its changes.
+        
+        Args:
+            name: Stored procedure name
+            args: Positional arguments for the procedure
+            
+        Returns:
+            Rows of the last result set as dictionaries, or None on error
+        """
+        connection, owned = self._checkout()
+        if not connection:
+            logger.error("Failed to get database connection")
+            return None
+        
+        try:
+            # Run the procedure's statements as one transaction, unless
+            # transaction() already has one open on this connection
+            if owned:
+                connection.start_transaction()
+            cursor = connection.cursor(dictionary=True)
+            logger.debug(f"Calling procedure: {name} with params: {args}")
+            cursor.callproc(name, args)
+            
+            rows = []
+            for result in cursor.stored_results():
+                # Stored result cursors do not always honour dictionary=True
+                rows = [
+                    row if isinstance(row, dict) else dict(zip(result.column_names, row))
+                    for row in result.fetchall()
+                ]
+            
+            if owned:
+                connection.commit()
+            cursor.close()
+            return rows
+        except mysql.connector.Error as e:
+            logger.error(f"Error calling procedure {name}: {str(e)}")
+            if owned and "2006" not in str(e) and "2013" not in str(e):
+                connection.rollback()
+            return None
+        finally:
+            if owned:
+                self._release_connection(connection)
+    
+    def _release_connection(self, connection) -> None:
+        """Return a connection to the pool (or close an overflow connection)."""
+        try:
+            connection.close()
+        except mysql.connector.Error as e:
+            logger.debug(f"Error releasing MySQL connection: {str(e)}")
+        finally:
+            if getattr(connection, "_overflow", False):
+                connection._overflow = False
+                self._overflow_slots.release()
@@ -10,10 +10,14 @@ def update_database_schema():
     db = MySQLConnection()
 
     
+    # User IDs are ASCII UUID strings: a fixed-width ascii_bin key is a quarter of the
+    # utf8mb4 index width and compares bytewise. Every user_id column must use the
+    # same type for the foreign keys.
+    
     # Create users table with multilingual support if it doesn't exist
     users_table = """
     CREATE TABLE IF NOT EXISTS users (
-        uid VARCHAR(36) PRIMARY KEY,
+        uid CHAR(36) CHARACTER SET ascii COLLATE ascii_bin PRIMARY KEY,
         email VARCHAR(255) UNIQUE NOT NULL,       
         display_name_en VARCHAR(255),
         display_name_zh VARCHAR(255),
@@ -50,7 +54,7 @@ def update_database_schema():
     user_badges_table = """
     CREATE TABLE IF NOT EXISTS user_badges (
         id INT AUTO_INCREMENT PRIMARY KEY,
-        user_id VARCHAR(36) NOT NULL,
+        user_id CHAR(36) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
         badge_id VARCHAR(36) NOT NULL,
         awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (user_id) REFERENCES users(uid),
@@ -63,7 +67,7 @@ def update_database_schema():
     error_category_stats_table = """
     CREATE TABLE IF NOT EXISTS error_category_stats (
         id INT AUTO_INCREMENT PRIMARY KEY,
-        user_id VARCHAR(36) NOT NULL,
+        user_id CHAR(36) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
         category VARCHAR(50) NOT NULL,
         encountered INT DEFAULT 0,
         identified INT DEFAULT 0,
@@ -78,7 +82,7 @@ def update_database_schema():
     activity_log_table = """
     CREATE TABLE IF NOT EXISTS activity_log (
         id INT AUTO_INCREMENT PRIMARY KEY,
-        user_id VARCHAR(36) NOT NULL,
+        user_id CHAR(36) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
         activity_type VARCHAR(50) NOT NULL,
         points INT NOT NULL,
         details_en TEXT,
@@ -96,12 +100,147 @@ def update_database_schema():
         db.execute_query(error_category_stats_table)
         db.execute_query(activity_log_table)      
         
+        create_indexes(db)
         insert_default_badges(db)
+        create_badge_procedures(db)
+        create_user_procedures(db)
         return True
     except Exception as e:
         logger.error(f"Error updating database schema: {str(e)}")
         return False
 
+def create_indexes(db):
+    """Add secondary indexes used by the leaderboard, badge and activity queries."""
+    # (table, index name, column list); unique keys on user_badges and
+    # error_category_stats already come from the table definitions
+    indexes = [
+        ("users", "ix_users_points", "total_points DESC"),
+        ("user_badges", "ix_ub_user_awarded", "user_id, awarded_at DESC"),
+        ("activity_log", "ix_al_user_created", "user_id, created_at DESC"),
+        ("activity_log", "ix_al_user_type", "user_id, activity_type"),
+    ]
+    
+    # MySQL has no CREATE INDEX IF NOT EXISTS, so look up existing ones first
+    existing_query = """
+        SELECT DISTINCT table_name AS table_name, index_name AS index_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+    """
+    rows = db.execute_query(existing_query) or []
+    existing = {(row["table_name"], row["index_name"]) for row in rows}
+    
+    for table, index_name, columns in indexes:
+        if (table, index_name) in existing:
+            continue
+        try:
+            db.execute_query(f"CREATE INDEX {index_name} ON {table} ({columns})")
+            logger.debug(f"Created index {index_name} on {table}")
+        except Exception as e:
+            logger.warning(f"Error creating index {index_name}: {str(e)}")
+
+def create_badge_procedures(db):
+    """
+    Create stored procedures used by the badge manager.
+    
+    Failure is not fatal: BadgeManager falls back to plain queries when a
+    procedure is missing (e.g. the DB user lacks CREATE ROUTINE).
+    """
+    # Award a badge, its points and the activity entry in one round trip
+    award_badge_procedure = """
+    CREATE PROCEDURE sp_award_badge(
+        IN p_user_id CHAR(36) CHARACTER SET ascii,
+        IN p_badge_id VARCHAR(36),
+        IN p_language VARCHAR(5),
+        IN p_details_prefix VARCHAR(255)
+    )
+    BEGIN
+        DECLARE v_points INT DEFAULT NULL;
+        DECLARE v_awarded INT DEFAULT 0;
+        
+        SELECT points INTO v_points FROM badges WHERE badge_id = p_badge_id;
+        
+        IF v_points IS NOT NULL THEN
+            INSERT IGNORE INTO user_badges (user_id, badge_id) VALUES (p_user_id, p_badge_id);
+            SET v_awarded = ROW_COUNT();
+            
+            IF v_awarded > 0 THEN
+                UPDATE users SET total_points = total_points + v_points WHERE uid = p_user_id;
+                
+                INSERT INTO activity_log (user_id, activity_type, points, details_en, details_zh)
+                SELECT p_user_id, 'badge_earned', v_points,
+                       CONCAT(p_details_prefix, ': ', IF(p_language = 'zh', name_zh, name_en)),
+                       CONCAT(p_details_prefix, ': ', IF(p_language = 'zh', name_zh, name_en))
+                FROM badges WHERE badge_id = p_badge_id;
+            END IF;
+        END IF;
+        
+        SELECT b.badge_id,
+               IF(p_language = 'zh', b.name_zh, b.name_en) AS name,
+               IF(p_language = 'zh', b.description_zh, b.description_en) AS description,
+               b.points,
+               v_awarded AS newly_awarded,
+               (SELECT total_points FROM users WHERE uid = p_user_id) AS total_points
+        FROM badges b
+        WHERE b.badge_id = p_badge_id;
+    END
+    """
+    
+    try:
+        db.execute_query("DROP PROCEDURE IF EXISTS sp_award_badge")
+        if db.execute_query(award_badge_procedure) is None:
+            logger.warning("Could not create sp_award_badge; badge awards will use plain queries")
+    except Exception as e:
+        logger.warning(f"Error creating badge procedures: {str(e)}")
+
+def create_user_procedures(db):
+    """
+    Create stored procedures used by the auth manager.
+    
+    Failure is not fatal: MySQLAuthManager falls back to plain queries when a
+    procedure is missing.
+    """
+    # Count a review, add its score and upgrade the level in one round trip.
+    # SET runs left to right: score is already the new score in the CASEs, and
+    # level_name_zh is set while level_name_en still holds the old level.
+    # The default case-insensitive collation also matches 'senior' and 'basic'.
+    review_stats_procedure = """
+    CREATE PROCEDURE sp_update_review_stats(
+        IN p_user_id CHAR(36) CHARACTER SET ascii,
+        IN p_score INT
+    )
+    BEGIN
+        DECLARE v_old_level_en VARCHAR(50) DEFAULT NULL;
+        
+        SELECT level_name_en INTO v_old_level_en FROM users WHERE uid = p_user_id FOR UPDATE;
+        
+        UPDATE users
+        SET reviews_completed = reviews_completed + 1,
+            score = score + p_score,
+            level_name_zh = CASE
+                WHEN score > 200 AND COALESCE(level_name_en, '') <> 'Senior' THEN '高級'
+                WHEN score > 100 AND level_name_en = 'Basic' THEN '中級'
+                ELSE level_name_zh
+            END,
+            level_name_en = CASE
+                WHEN score > 200 AND COALESCE(level_name_en, '') <> 'Senior' THEN 'Senior'
+                WHEN score > 100 AND level_name_en = 'Basic' THEN 'Medium'
+                ELSE level_name_en
+            END
+        WHERE uid = p_user_id;
+        
+        SELECT reviews_completed, score, level_name_en, v_old_level_en AS old_level_en
+        FROM users
+        WHERE uid = p_user_id;
+    END
+    """
+    
+    try:
+        db.execute_query("DROP PROCEDURE IF EXISTS sp_update_review_stats")
+        if db.execute_query(review_stats_procedure) is None:
+            logger.warning("Could not create sp_update_review_stats; review stats will use plain queries")
+    except Exception as e:
+        logger.warning(f"Error creating user procedures: {str(e)}")
+
 def insert_default_badges(db):
     """Insert default badges into the badges table with multilingual support."""
     # Check if badges already exist
@@ -8,7 +8,7 @@ by leveraging the modular components from the workflow package.
 __all__ = ['JavaCodeReviewGraph']
 
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
 
 from state_schema import WorkflowState
 
@@ -52,18 +52,19 @@ class JavaCodeReviewGraph:
         self.workflow_nodes = self.workflow_manager.workflow_nodes
         self.conditions = WorkflowConditions()
     
-    def generate_code_node(self, state: WorkflowState) -> WorkflowState:
+    def generate_code_node(self, state: WorkflowState, on_token: Optional[Callable[[str], None]] = None) -> WorkflowState:
         """
         Generate Java code with errors node.
         
         Args:
             state: Current workflow state
+            on_token: Optional callback that receives streamed code chunks
             
         Returns:
             Updated workflow state with generated code
         """
         # Delegate to workflow nodes implementation
-        return self.workflow_nodes.generate_code_node(state)
+        return self.workflow_nodes.generate_code_node(state, on_token=on_token)
     
     def regenerate_code_node(self, state: WorkflowState) -> WorkflowState:
         """
@@ -132,19 +132,14 @@ ADVANCED-LEVEL CODE REQUIREMENTS:
 - Implement errors that interact with each other in non-obvious ways
 """
 
-# Evaluation Prompt Template
-evaluation_template = """As a Java code quality expert, your task is to analyze Java code to determine if it correctly implements specific requested errors.
+# Evaluation Prompt Templates
+# The instructions contain no placeholders so every evaluation prompt shares a
+# byte-identical prefix that LLM providers can serve from their prompt cache;
+# the code and requested errors follow in evaluation_input_template.
+evaluation_instructions_template = """As a Java code quality expert, your task is to analyze Java code to determine if it correctly implements specific requested errors.
 
 MAIN TASK:
-Evaluate if the provided Java code correctly implements EXACTLY {error_count} specific errors that were requested.
-
-CODE TO EVALUATE:
-```java
-{code}
-```
-
-THE {error_count} SPECIFIC ERRORS THAT SHOULD BE PRESENT:
-{error_instructions}
+Evaluate if the Java code given at the end of this prompt correctly implements EXACTLY the number of specific errors that were requested.
 
 EVALUATION INSTRUCTIONS:
 1. Examine the code line by line, identifying each error that matches the requested list
@@ -154,45 +149,54 @@ EVALUATION INSTRUCTIONS:
 - A brief code segment showing the error
 - A concise explanation of why it matches the requested error
 3. Check if any requested errors are missing from the code
-4. For valid implementation, the code must contain EXACTLY {error_count} errors - no more, no fewer
+4. For valid implementation, the code must contain EXACTLY the requested number of errors - no more, no fewer
 
 RESPONSE FORMAT:
 Your evaluation must be returned in this JSON format:
 
 ```json
-{{
+{
 "Identified Problems": [
-    {{
+    {
     "Error Type": "Logical",
     "Error Name": "Misunderstanding of short-circuit evaluation",
     "Line Number": 42,
     "Code Segment": "if (obj != null & obj.getValue() > 0) { ... }",
     "Expanation": "This code uses the non-short-circuit '&' operator instead of '&&', which means obj.getValue() will be evaluated even if obj is null, potentially causing a NullPointerException."
-    }}
+    }
     // List all implemented errors that match the requested list
 ],
 "Missed Problems": [
-    {{
+    {
     "Error Type":"Code Quality", 
     "Error Name": "Code duplication",
     "Expanation": "The code does not contain instances of duplicated logic or repeated code blocks that could be refactored into shared methods. Code duplication is when similar functionality is implemented multiple times instead of being extracted into reusable methods, which reduces maintainability and increases the risk of inconsistent bug fixes."
-    }}
+    }
     // List all requested errors that aren't implemented
 ],
 "Valid": true,  // Set to true ONLY if ALL requested errors are implemented, no more and no fewer
-"Feedback": "The code successfully implements all {error_count} requested errors."  // Provide brief overall assessment
-}}
+"Feedback": "The code successfully implements all requested errors."  // Provide brief overall assessment
+}
 ```
 
 VERIFICATION CHECKLIST:
 - Confirm that each found error truly matches the corresponding requested error
-- Verify that the total count of found errors is EXACTLY {error_count} for validity
+- Verify that the total count of found errors is EXACTLY the requested number for validity
 - Double-check any errors you believe are missing to ensure they're truly absent
 - Ensure your JSON response is properly formatted for processing
 
 IMPORTANT: Focus solely on the specified error types and names, not general code quality issues.
 """
 
+evaluation_input_template = """THE {error_count} SPECIFIC ERRORS THAT SHOULD BE PRESENT:
+{error_instructions}
+
+CODE TO EVALUATE:
+```java
+{code}
+```
+"""
+
 # Review Analysis Prompt Template
 review_analysis_template = """You are an educational assessment specialist analyzing a student's Java code review skills.
 
@@ -87,19 +87,11 @@ advanced_instructions = """
 - 實現以非明顯方式相互作用的錯誤
 """
 
-# Evaluation Prompt Template
-evaluation_template = """作為Java代碼質量專家，您的任務是分析Java代碼，確定它是否正確實現了特定的請求錯誤。
+# Evaluation Prompt Templates (see prompts/en.py for the static/dynamic split)
+evaluation_instructions_template = """作為Java代碼質量專家，您的任務是分析Java代碼，確定它是否正確實現了特定的請求錯誤。
 
 主要任務：
-評估提供的Java代碼是否正確實現了恰好{error_count}個特定的請求錯誤。
-
-要評估的代碼：
-```java
-{code}
-```
-
-應該存在的{error_count}個特定錯誤：
-{error_instructions}
+評估本提示末尾提供的Java代碼是否正確實現了恰好所請求數量的特定錯誤。
 
 評估指示：
 1. 逐行檢查代碼，識別與請求列表匹配的每個錯誤
@@ -109,7 +101,7 @@ evaluation_template = """作為Java代碼質量專家，您的任務是分析Jav
 - 顯示錯誤的簡短代碼段
 - 為什麼它與請求的錯誤匹配的簡明解釋
 3. 檢查代碼中是否缺少任何請求的錯誤
-4. 對於有效的實現，代碼必須恰好包含{error_count}個錯誤 - 不多也不少
+4. 對於有效的實現，代碼必須恰好包含所請求數量的錯誤 - 不多也不少
 
 回應格式：
 您的評估必須以以下JSON格式返回：
@@ -135,19 +127,28 @@ evaluation_template = """作為Java代碼質量專家，您的任務是分析Jav
     // 列出所有未實現的請求錯誤
 ],
 "有效": true,  // 只有當所有請求的錯誤都已實現，不多也不少時才設為true
-"反饋": "代碼成功實現了所有{error_count}個請求的錯誤。"  // 提供簡要的總體評估
+"反饋": "代碼成功實現了所有請求的錯誤。"  // 提供簡要的總體評估
 }
 ```
 
 驗證清單：
 - 確認每個找到的錯誤確實與相應的請求錯誤匹配
-- 驗證找到的錯誤總數恰好為{error_count}，以確認有效性
+- 驗證找到的錯誤總數恰好為所請求的數量，以確認有效性
 - 仔細檢查您認為缺失的任何錯誤，確保它們確實不存在
 - 確保您的JSON回應格式正確，便於處理
 
 重要提示：僅關注指定的錯誤類型和名稱，而非一般的代碼質量問題。
 """
 
+evaluation_input_template = """應該存在的{error_count}個特定錯誤：
+{error_instructions}
+
+要評估的代碼：
+```java
+{code}
+```
+"""
+
 # Regeneration Prompt Template
 regeneration_template = """您是一位教育性的Java錯誤創建者，故意在代碼中引入特定錯誤用於教學目的。
 
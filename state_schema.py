@@ -4,7 +4,7 @@ State Schema for Java Code Review Training System.
 This module defines the state schema for the LangGraph-based workflow.
 """
 
-__all__ = ['WorkflowState', 'CodeSnippet', 'ReviewAttempt']
+__all__ = ['WorkflowState', 'CodeSnippet', 'ReviewAttempt', 'new_workflow_state']
 
 from typing import List, Dict, Any, Optional, TypedDict, Literal
 from pydantic import BaseModel, Field
@@ -26,6 +26,9 @@ class ReviewAttempt(BaseModel):
 
 class WorkflowState(BaseModel):
     """The state for the Java Code Review workflow"""
+    # Nodes mutate this model in place (state.field = value). Pydantic does not
+    # validate plain attribute assignment unless validate_assignment is enabled,
+    # so updates between steps cost a normal setattr.
     # Current workflow step
     current_step: Literal["generate", "review", "analyze", "summarize", "complete"] = Field(
         "generate", description="Current step in the workflow"
@@ -75,4 +78,13 @@ class WorkflowState(BaseModel):
     code_generation_feedback: Optional[str] = Field(None, description="Feedback for code generation")
     
     # Original requested errors count (for consistency throughout the workflow)
-    original_error_count: int = Field(0, description="Original number of errors requested for generation")
\ No newline at end of file
+    original_error_count: int = Field(0, description="Original number of errors requested for generation")
+
+
+# Pristine state built once per process; copying it skips field validation
+_EMPTY_WORKFLOW_STATE = WorkflowState()
+
+
+def new_workflow_state() -> WorkflowState:
+    """Return a fresh default WorkflowState copied from a prebuilt template."""
+    return _EMPTY_WORKFLOW_STATE.model_copy(deep=True)
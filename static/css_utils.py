@@ -2,21 +2,47 @@
 CSS utility functions for loading and managing CSS in Streamlit applications.
 """
 import os
+import glob
 import streamlit as st
+from typing import List, Optional, Tuple
 
-def load_css(css_file=None, css_directory=None):
+def _css_mtime_key(css_file: Optional[str] = None, css_directory: Optional[str] = None) -> float:
     """
-    Load CSS from file or directory into Streamlit.
+    Compute a cache key that changes whenever any of the CSS sources change.
     
     Args:
         css_file: Path to single CSS file
         css_directory: Path to directory containing CSS files
         
     Returns:
-        List of loaded CSS file names or empty list if none loaded
+        Latest modification time across the CSS sources, or 0.0 if none exist
+    """
+    paths = []
+    if css_file and os.path.exists(css_file):
+        paths.append(css_file)
+    if css_directory and os.path.isdir(css_directory):
+        paths.extend(glob.glob(os.path.join(css_directory, "*.css")))
+    return max((os.path.getmtime(path) for path in paths), default=0.0)
+
+@st.cache_data(show_spinner=False)
+def _load_css_cached(css_file: Optional[str], css_directory: Optional[str],
+                     mtime_key: float) -> Tuple[str, List[str], List[str]]:
+    """
+    Read and concatenate CSS sources.
+    
+    Cached on the source paths and mtime_key so file I/O only happens when a CSS file changes.
+    
+    Args:
+        css_file: Path to single CSS file
+        css_directory: Path to directory containing CSS files
+        mtime_key: Result of _css_mtime_key() for the same sources
+        
+    Returns:
+        Tuple of (concatenated CSS, loaded file names, error messages)
     """
     css_content = ""
     loaded_files = []
+    errors = []
     
     # Load single file if specified
     if css_file and os.path.exists(css_file):
@@ -25,7 +51,7 @@ def load_css(css_file=None, css_directory=None):
                 css_content += f.read()
                 loaded_files.append(os.path.basename(css_file))
         except Exception as e:
-            st.error(f"Error loading CSS file {css_file}: {str(e)}")
+            errors.append(f"Error loading CSS file {css_file}: {str(e)}")
     
     # Load all CSS files from directory if specified
     if css_directory and os.path.exists(css_directory) and os.path.isdir(css_directory):
@@ -61,11 +87,30 @@ def load_css(css_file=None, css_directory=None):
                         loaded_files.append(filename)
                         
         except Exception as e:
-            st.error(f"Error loading CSS files from directory {css_directory}: {str(e)}")
+            errors.append(f"Error loading CSS files from directory {css_directory}: {str(e)}")
+    
+    return css_content, loaded_files, errors
+
+def load_css(css_file=None, css_directory=None):
+    """
+    Load CSS from file or directory into Streamlit.
+    
+    Args:
+        css_file: Path to single CSS file
+        css_directory: Path to directory containing CSS files
+        
+    Returns:
+        List of loaded CSS file names or empty list if none loaded
+    """
+    mtime_key = _css_mtime_key(css_file, css_directory)
+    css_content, loaded_files, errors = _load_css_cached(css_file, css_directory, mtime_key)
+    
+    for error in errors:
+        st.error(error)
     
     # Apply CSS if we loaded any
     if css_content:
         st.markdown(f"<style>{css_content}</style>", unsafe_allow_html=True)
         return loaded_files
     
-    return []
\ No newline at end of file
+    return []
@@ -0,0 +1,100 @@
+import time
+
+import mysql.connector
+import pytest
+from mysql.connector import pooling
+
+from db.mysql_connection import MySQLConnection
+
+
+class _FakeConnection:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A MySQLConnection whose pool is empty and whose overflow connections are fakes."""
+    monkeypatch.setenv("DB_POOL_OVERFLOW", "2")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "0.2")
+    monkeypatch.setattr(MySQLConnection, "_instance", None)
+    monkeypatch.setattr(MySQLConnection, "_initialize_database", lambda self: None)
+    monkeypatch.setattr(mysql.connector, "connect", lambda **config: _FakeConnection())
+
+    db = MySQLConnection()
+    # A pool created without connection settings holds no connections, so
+    # every get_connection() fails with the real PoolError
+    db._pool = pooling.MySQLConnectionPool(pool_name="test_exhausted_pool", pool_size=1)
+    return db
+
+
+def test_exhausted_pool_opens_overflow_connections(db):
+    first = db._get_connection()
+    second = db._get_connection()
+
+    assert isinstance(first, _FakeConnection)
+    assert isinstance(second, _FakeConnection)
+
+
+def test_exhausted_overflow_waits_then_gives_up(db):
+    db._get_connection()
+    db._get_connection()
+
+    started = time.monotonic()
+    assert db._get_connection() is None
+    assert time.monotonic() - started >= db.pool_timeout
+
+
+def test_released_overflow_connection_frees_its_slot(db):
+    first = db._get_connection()
+    db._get_connection()
+    db._release_connection(first)
+
+    assert isinstance(db._get_connection(), _FakeConnection)
+
+
+class _DeadlockCursor:
+    executions = 0
+
+    def execute(self, query, params):
+        type(self).executions += 1
+        raise mysql.connector.errors.DatabaseError("Deadlock found when trying to get lock", errno=1213)
+
+    def close(self):
+        pass
+
+
+class _TransactionConnection(_FakeConnection):
+    def __init__(self):
+        self.committed = False
+        self.rolled_back = False
+
+    def start_transaction(self):
+        pass
+
+    def cursor(self, prepared=False):
+        return _DeadlockCursor()
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def test_failed_prepared_statement_rolls_back_transaction(db, monkeypatch):
+    connection = _TransactionConnection()
+    monkeypatch.setattr(db, "_get_connection", lambda: connection)
+    _DeadlockCursor.executions = 0
+
+    with pytest.raises(mysql.connector.errors.DatabaseError):
+        with db.transaction():
+            try:
+                db.execute_prepared("UPDATE users SET score = score + 1 WHERE uid = %s", ("u1",))
+            except mysql.connector.Error:
+                # Callers that swallow the error must not turn it into a commit
+                pass
+
+    assert _DeadlockCursor.executions == 1
+    assert connection.rolled_back
+    assert not connection.committed
@@ -30,11 +30,20 @@ class AuthUI:
     This class handles the login, registration, and profile display interfaces
     for user authentication with a local JSON file.
     """
+    # Seconds a database level lookup is trusted before querying again
+    LEVEL_REFRESH_SECONDS = 60
+    
     def __init__(self):
         """Initialize the AuthUI component with local auth manager."""
         self.auth_manager = MySQLAuthManager()
+        self.init_auth_state()
+    
+    def init_auth_state(self) -> None:
+        """
+        Initialize session state for authentication.
         
-        # Initialize session state for authentication
+        Called on every run because a single AuthUI instance is shared across sessions.
+        """
         if "auth" not in st.session_state:
             st.session_state.auth = {
                 "is_authenticated": False,
@@ -212,6 +221,10 @@ class AuthUI:
         """Handle user logout by clearing authentication state and triggering full reset."""
         logger.debug("User logout initiated")
         
+        # A later login should start fresh, not resume this session's workflow
+        from ui.utils.main_ui import forget_workflow_state
+        forget_workflow_state(st.session_state.get("auth", {}).get("user_id"))
+        
         # Clear authentication session
         st.session_state.auth = {
             "is_authenticated": False,
@@ -297,16 +310,25 @@ class AuthUI:
             return None
         
         user_id = st.session_state.auth.get("user_id")
+        current_language = get_current_language()
+        
+        # Reuse the level from a recent lookup in the same language; level
+        # changes made in this session already update user_info directly
+        checked_language, checked_at = st.session_state.auth.get("level_checked", (None, 0.0))
+        cached_level = st.session_state.auth.get("user_info", {}).get("level")
+        if (cached_level and checked_language == current_language
+                and time.time() - checked_at < self.LEVEL_REFRESH_SECONDS):
+            return cached_level
             
         try:
             # Query the database for the latest user info
             profile = self.auth_manager.get_user_profile(user_id)           
-            current_language = get_current_language()
             
             if profile.get("success", False):
                 # Update the session state with the latest level
                 level = profile.get("level_name_"+ current_language, "basic")
                 st.session_state.auth["user_info"]["level"] = level
+                st.session_state.auth["level_checked"] = (current_language, time.time())
                 return level
             else:
                 # Fallback to session state if query fails
@@ -11,7 +11,7 @@ import random
 import time
 from typing import List, Dict, Any, Optional, Tuple, Callable
 from utils.language_utils import t
-from state_schema import WorkflowState
+from state_schema import new_workflow_state
 
 # Configure logging
 logging.basicConfig(
@@ -396,6 +396,31 @@ class ErrorSelectorUI:
         }
 
 
+def _code_stream_callback(placeholder, min_chars: int = 200) -> Callable[[str], None]:
+    """
+    Create an on_token callback that renders streamed code into a placeholder.
+    
+    Args:
+        placeholder: st.empty() element to render into
+        min_chars: Minimum number of new characters between re-renders
+        
+    Returns:
+        Callback accepting each streamed text chunk
+    """
+    chunks = []
+    stream = {"length": 0, "rendered": 0}
+    
+    def on_token(text: str) -> None:
+        chunks.append(text)
+        stream["length"] += len(text)
+        # Re-rendering on every token would send one delta per chunk
+        if stream["length"] - stream["rendered"] >= min_chars:
+            stream["rendered"] = stream["length"]
+            placeholder.code("".join(chunks), language="java")
+    
+    return on_token
+
+
 def generate_code_problem(workflow, 
                         params: Dict[str, str], 
                         error_selection_mode: str,
@@ -792,7 +817,7 @@ def render_generate_tab(workflow, error_selector_ui, code_display_ui, user_level
                 st.session_state[key] = value
 
             # Initialize a fresh workflow state
-            st.session_state.workflow_state = WorkflowState()
+            st.session_state.workflow_state = new_workflow_state()
 
             # Initialize empty workflow steps
             st.session_state.workflow_steps = []
@@ -879,8 +904,13 @@ def render_generate_tab(workflow, error_selector_ui, code_display_ui, user_level
                 try:
                     # Run the full generate-evaluate-regenerate workflow
                     with st.spinner(t("generating_code")):
-                        # Step 1: Generate initial code
-                        state = workflow.generate_code_node(st.session_state.workflow_state)
+                        # Step 1: Generate initial code, showing the code as it streams in
+                        stream_placeholder = st.empty()
+                        state = workflow.generate_code_node(
+                            st.session_state.workflow_state,
+                            on_token=_code_stream_callback(stream_placeholder)
+                        )
+                        stream_placeholder.empty()
                         st.session_state.workflow_steps.append(t("generated_initial_code"))
                         
                         if state.error:
@@ -11,20 +11,151 @@ import logging
 import re
 import json
 import time
-from typing import Dict, List, Any, Optional
+import copy
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 
 from utils.llm_logger import LLMInteractionLogger
-from state_schema import WorkflowState
+from state_schema import WorkflowState, new_workflow_state
 from utils.language_utils import t, get_current_language
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Session keys that describe the same workflow as workflow_state, so they are
+# saved and restored together with it
+_RESTORED_SESSION_KEYS = (
+    "workflow_steps", "active_tab", "error_selection_mode",
+    "selected_error_categories", "selected_specific_errors"
+)
+
+
+class _WorkflowStore:
+    """
+    Latest workflow session values per user, bounded by count and age.
+    
+    Entries expire after ttl seconds and the least recently saved ones are
+    dropped beyond max_users, so the store cannot grow with every user the
+    server has ever seen.
+    """
+    
+    def __init__(self, max_users: int, ttl: float):
+        """
+        Initialize an empty store.
+        
+        Args:
+            max_users: Maximum number of users kept
+            ttl: Seconds an entry stays restorable after it was last saved
+        """
+        self.max_users = max_users
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def save(self, user_id: str, values: Dict[str, Any]) -> None:
+        """
+        Record a user's workflow session values.
+        
+        Args:
+            user_id: The user's ID
+            values: Session values keyed by session state name
+        """
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+    
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a user's saved workflow session values.
+        
+        Args:
+            user_id: The user's ID
+            
+        Returns:
+            Saved values, or None if there are none or they have expired
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[user_id]
+                return None
+            return entry[1]
+    
+    def discard(self, user_id: str) -> None:
+        """
+        Forget a user's saved workflow session values.
+        
+        Args:
+            user_id: The user's ID
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+@st.cache_resource(show_spinner=False)
+def _workflow_store() -> _WorkflowStore:
+    """
+    Process-wide store of the latest workflow state per user.
+    
+    Returns:
+        The shared _WorkflowStore
+    """
+    return _WorkflowStore(
+        max_users=int(os.getenv("WORKFLOW_STORE_MAX_USERS", "200")),
+        ttl=float(os.getenv("WORKFLOW_STORE_TTL", "7200"))
+    )
+
+
+def _sync_workflow_store() -> None:
+    """Restore a lost session's workflow state for the user, or record the current one."""
+    user_id = st.session_state.get("auth", {}).get("user_id")
+    if not user_id:
+        return
+    
+    store = _workflow_store()
+    if 'workflow_state' not in st.session_state:
+        # New session (e.g. after a browser reload): resume the user's last workflow
+        saved = store.load(user_id)
+        if saved is not None:
+            st.session_state.workflow_state = saved["workflow_state"].model_copy(deep=True)
+            for key in _RESTORED_SESSION_KEYS:
+                if key in saved:
+                    st.session_state[key] = copy.deepcopy(saved[key])
+            logger.debug(f"Restored workflow state for user {user_id}")
+            return
+    else:
+        values = {"workflow_state": st.session_state.workflow_state}
+        for key in _RESTORED_SESSION_KEYS:
+            if key in st.session_state:
+                values[key] = st.session_state[key]
+        store.save(user_id, values)
+
+
+def forget_workflow_state(user_id: str) -> None:
+    """
+    Drop a user's saved workflow state, e.g. on logout.
+    
+    Args:
+        user_id: The user's ID
+    """
+    if user_id:
+        _workflow_store().discard(user_id)
+
+
 def init_session_state():
     """Initialize session state with default values."""
-    # Initialize workflow state
+    _sync_workflow_store()
+    
+    # Objects that are expensive to build are only created when missing
     if 'workflow_state' not in st.session_state:
-        st.session_state.workflow_state = WorkflowState()
+        st.session_state.workflow_state = new_workflow_state()
+    if 'llm_logger' not in st.session_state:
+        st.session_state.llm_logger = LLMInteractionLogger()
     
     # Initialize UI state
     ui_defaults = {
@@ -32,20 +163,16 @@ def init_session_state():
         'error': None,
         'workflow_steps': [],
         'sidebar_tab': "Status",
-        'user_level': None
+        'user_level': None,
+        'provider_selection': "groq"
     }
     
     for key, default_value in ui_defaults.items():
-        if key not in st.session_state:
-            st.session_state[key] = default_value
+        st.session_state.setdefault(key, default_value)
     
     # Initialize workflow state attributes
     _init_workflow_state_attributes()
     
-    # Initialize LLM logger
-    if 'llm_logger' not in st.session_state:
-        st.session_state.llm_logger = LLMInteractionLogger()
-    
     # Clean up legacy session state
     _cleanup_legacy_session_state()
 
@@ -75,39 +202,58 @@ def _cleanup_legacy_session_state():
         del st.session_state.code_snippet
 
 
-def create_enhanced_tabs(labels: List[str]):
+_TAB_SELECTOR_KEY = "_active_tab_selector"
+
+
+def _on_tab_selected() -> None:
+    """Copy the tab selector value into the shared active_tab state."""
+    st.session_state.active_tab = st.session_state[_TAB_SELECTOR_KEY]
+
+
+def create_enhanced_tabs(labels: List[str]) -> int:
     """
-    Create enhanced UI tabs with proper state management.
+    Create the main tab selector and return the index of the active tab.
+    
+    Unlike st.tabs, which executes every tab body on each rerun, the
+    selector lets the caller render only the active panel.
     
     Args:
         labels: List of tab labels
         
     Returns:
-        List of tab objects
+        Index of the tab that should be rendered
     """
-    # Create tabs
-    tabs = st.tabs(labels)
-    
     # Handle forced tab reset
     if st.session_state.get("force_tab_zero", False):
         st.session_state.active_tab = 0
         del st.session_state["force_tab_zero"]
     
     # Get current active tab
-    current_tab = st.session_state.active_tab
+    current_tab = st.session_state.get("active_tab", 0)
+    if not 0 <= current_tab < len(labels):
+        current_tab = 0
     
     # Check review completion for feedback tab access
     if current_tab == 2:  # Feedback tab
         if not _is_review_completed():
             st.warning("Please complete all review attempts before accessing feedback.")
-            st.session_state.active_tab = 1
             current_tab = 1
     
-    # Update active tab
-    if current_tab != 0:
-        st.session_state.active_tab = current_tab
+    st.session_state.active_tab = current_tab
+    
+    # Keep the selector in sync with tab switches made from code
+    st.session_state[_TAB_SELECTOR_KEY] = current_tab
+    st.radio(
+        "tabs",
+        options=range(len(labels)),
+        format_func=labels.__getitem__,
+        key=_TAB_SELECTOR_KEY,
+        horizontal=True,
+        label_visibility="collapsed",
+        on_change=_on_tab_selected
+    )
     
-    return tabs
+    return current_tab
 
 
 def _is_review_completed() -> bool:
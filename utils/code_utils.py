@@ -6,10 +6,12 @@ extracting code from responses, and handling error comments.
 """
 
 import re
+import json
 import random
 import os
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import functools
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 from langchain_core.language_models import BaseLanguageModel
 from utils.language_utils import t, get_llm_prompt_instructions, get_current_language
 
@@ -157,15 +159,10 @@ def create_evaluation_prompt(code: str, requested_errors: list) -> str:
 
     error_instructions = "\n".join(error_list)
 
-    # Get language-specific instructions
-    language_instructions = get_llm_prompt_instructions(get_current_language())
-
-    # Get language-specific template
-    template = get_prompt_template("evaluation_template")
-    
-    # Create the prompt by filling in the template safely
-    prompt = f"{language_instructions}. " + format_prompt_safely(
-        template,
+    # Static instructions first so the prompt prefix is identical across calls,
+    # then the requested errors and the code
+    prompt = _evaluation_prompt_prefix(get_current_language()) + format_prompt_safely(
+        get_prompt_template("evaluation_input_template"),
         code=add_line_numbers(code),
         error_count=error_count,
         error_instructions=error_instructions
@@ -173,6 +170,24 @@ def create_evaluation_prompt(code: str, requested_errors: list) -> str:
     
     return prompt
 
+@functools.lru_cache(maxsize=None)
+def _evaluation_prompt_prefix(language: str) -> str:
+    """
+    Build the static part of the evaluation prompt for a language.
+    
+    The prefix carries no per-call values, so providers with prompt caching
+    can reuse their work on it across evaluations.
+    
+    Args:
+        language: Language code
+        
+    Returns:
+        Language instructions followed by the evaluation instructions
+    """
+    language_instructions = get_llm_prompt_instructions(language)
+    template = get_prompt_template("evaluation_instructions_template", language)
+    return f"{language_instructions}. {template}\n"
+
 def create_regeneration_prompt(code: str, domain: str, missing_errors: list, found_errors: list, requested_errors: list) -> str:
     """
     Create a focused prompt for regenerating code with missing errors and removing extra errors.
@@ -542,6 +557,144 @@ def process_llm_response(response):
                 pass
         return ""
 
+# Trailing commas are invalid JSON but common in LLM output
+_TRAILING_COMMA_OBJ = re.compile(r',\s*}')
+_TRAILING_COMMA_ARR = re.compile(r',\s*]')
+
+def strip_trailing_commas(json_str: str) -> str:
+    """
+    Remove trailing commas before closing braces and brackets.
+    
+    Args:
+        json_str: Candidate JSON text
+        
+    Returns:
+        The text without trailing commas
+    """
+    return _TRAILING_COMMA_ARR.sub(']', _TRAILING_COMMA_OBJ.sub('}', json_str))
+
+def loads_lenient(json_str: str, loads: Callable[[str], Any] = json.loads) -> Any:
+    """
+    Parse JSON, retrying with trailing commas removed only if the clean parse fails.
+    
+    Args:
+        json_str: Candidate JSON text
+        loads: JSON parser raising json.JSONDecodeError (or a subclass) on bad input
+        
+    Returns:
+        Parsed JSON value
+        
+    Raises:
+        json.JSONDecodeError: If the text is not valid JSON even after cleanup
+    """
+    try:
+        return loads(json_str)
+    except json.JSONDecodeError:
+        return loads(strip_trailing_commas(json_str))
+
+def iter_json_objects(chunks: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Find balanced top-level {...} spans in text that may arrive in pieces.
+    
+    Braces are only counted outside JSON strings, and strings only once an
+    object has opened.
+    
+    Args:
+        chunks: Pieces of the text, in order
+        
+    Yields:
+        Tuples of (text received up to the closing brace, object text)
+    """
+    parts = []
+    received = 0
+    depth = 0
+    start = None
+    in_string = False
+    escaped = False
+    
+    for text in chunks:
+        parts.append(text)
+        for offset, char in enumerate(text):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = start is not None
+            elif char == '{':
+                if start is None:
+                    start = received + offset
+                depth += 1
+            elif char == '}' and start is not None:
+                depth -= 1
+                if depth == 0:
+                    full = "".join(parts)
+                    end = received + offset + 1
+                    yield full[:end], full[start:end]
+                    start = None
+        received += len(text)
+
+def find_json_object(text: str) -> Optional[str]:
+    """
+    Find the first balanced {...} span in text, ignoring braces inside JSON strings.
+    
+    Args:
+        text: Text that may contain a JSON object
+        
+    Returns:
+        The object text, or None if no balanced object is found
+    """
+    for _, candidate in iter_json_objects((text,)):
+        return candidate
+    return None
+
+def stream_first_json_object(llm: BaseLanguageModel, prompt: str,
+                             loads: Callable[[str], Any] = json.loads) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Stream an LLM response, parsing JSON as soon as a top-level object closes.
+    
+    Once an object parses, the stream is closed so the rest of the reply is
+    never waited for; otherwise the full text is returned for the caller's
+    usual extraction fallbacks.
+    
+    Args:
+        llm: Language model supporting stream()
+        prompt: Prompt to send
+        loads: JSON parser raising json.JSONDecodeError (or a subclass) on bad input
+        
+    Returns:
+        Tuple of (response text received, parsed object or None)
+    """
+    stream = llm.stream(prompt)
+    parts = []
+    
+    def texts():
+        for chunk in stream:
+            text = getattr(chunk, "content", chunk)
+            if not isinstance(text, str):
+                text = str(text)
+            parts.append(text)
+            yield text
+    
+    try:
+        for received, candidate in iter_json_objects(texts()):
+            try:
+                parsed = loads_lenient(candidate, loads)
+            except json.JSONDecodeError:
+                # Not valid JSON; look for the next object
+                continue
+            if isinstance(parsed, dict):
+                return received, parsed
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    
+    return "".join(parts), None
+
 def get_error_count_from_state(state: Any, difficulty_level: str = "medium") -> int:
     """
     Get error count from the state object or parameters.
@@ -9,6 +9,9 @@ import streamlit as st
 import os
 import logging
 import sys
+import functools
+import contextvars
+from contextlib import contextmanager
 from typing import Dict, Any, Optional
 
 # Add the parent directory to the path to allow absolute imports
@@ -41,6 +44,10 @@ def set_language(lang: str):
         logger.warning(f"Unsupported language: {lang}, using default: {DEFAULT_LANGUAGE}")
         st.session_state.language = DEFAULT_LANGUAGE
 
+# Language pinned by language_scope(); worker threads have no Streamlit
+# session, so work handed to them carries the caller's language this way
+_language_override: contextvars.ContextVar = contextvars.ContextVar("language_override", default=None)
+
 def get_current_language() -> str:
     """
     Get the current language.
@@ -48,8 +55,38 @@ def get_current_language() -> str:
     Returns:
         Current language code
     """
+    override = _language_override.get()
+    if override is not None:
+        return override
     return st.session_state.get("language", DEFAULT_LANGUAGE)
 
+@contextmanager
+def language_scope(lang: str):
+    """
+    Make get_current_language() and t() use a fixed language inside the block.
+    
+    Args:
+        lang: Language code (e.g., 'en', 'zh')
+    """
+    token = _language_override.set(lang)
+    try:
+        yield
+    finally:
+        _language_override.reset(token)
+
+@functools.lru_cache(maxsize=None)
+def _load_translations(lang: str) -> Dict[str, str]:
+    """
+    Load the translations dictionary for a language once per process.
+    
+    Args:
+        lang: Language code (e.g., 'en', 'zh')
+        
+    Returns:
+        Dictionary of translations
+    """
+    return get_translations(lang)
+
 def t(key: str) -> str:
     """
     Translate a text key to the current language.
@@ -60,11 +97,21 @@ def t(key: str) -> str:
     Returns:
         Translated text
     """
-    current_lang = get_current_language()
-    translations = get_translations(current_lang)
+    return t_for(get_current_language(), key)
+
+def t_for(lang: str, key: str) -> str:
+    """
+    Translate a text key to a given language without touching the session language.
     
+    Args:
+        lang: Language code (e.g., 'en', 'zh')
+        key: Text key to translate
+        
+    Returns:
+        Translated text
+    """
     # Return the translation if found, otherwise return the key itself
-    return translations.get(key, key)
+    return _load_translations(lang).get(key, key)
 
 def render_language_selector():
     """Render a simplified language selector in the sidebar."""
@@ -6,6 +6,7 @@ all components of the workflow system.
 """
 
 import logging
+import threading
 from typing import Dict, Any, List, Optional, Tuple
 
 from langgraph.graph import StateGraph
@@ -24,6 +25,7 @@ from workflow.builder import GraphBuilder
 from utils.llm_logger import LLMInteractionLogger
 from utils.language_utils import t
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -247,62 +249,38 @@ class WorkflowManager:
                         "targeted_guidance": review.targeted_guidance
                     })
                         
-                if hasattr(self, "evaluator") and self.evaluator:
-                    state.comparison_report = self.evaluator.generate_comparison_report(
-                        found_errors,
-                        latest_review.analysis,
-                        converted_history
-                    )
-                    logger.debug(t("generated_comparison_report"))
-                
-                if "auth" in st.session_state and st.session_state.auth.get("is_authenticated", False):
-                    user_id = st.session_state.auth.get("user_id")
-                    if user_id:
-                        # Check if badge manager is available
-                        try:
-                            from auth.badge_manager import BadgeManager
-                            badge_manager = BadgeManager()
-                            
-                            # Get error categories from found_errors
-                            if state.evaluation_result and t('found_errors') in state.evaluation_result:
-                                found_errors = state.evaluation_result[t('found_errors')]
-                                
-                                # Group by category
-                                category_stats = {}
-                                for error in found_errors:
-                                    error_str = str(error)
-                                    # Extract category from error string (e.g., "LOGICAL - Off-by-one error")
-                                    parts = error_str.split(" - ", 1)
-                                    if len(parts) > 0:
-                                        category = parts[0]
-                                        if category not in category_stats:
-                                            category_stats[category] = {"encountered": 0, "identified": 0}
-                                        category_stats[category]["encountered"] += 1
-                                
-                                # Update identified counts from review analysis
-                                if latest_review and latest_review.analysis:
-                                    identified = latest_review.analysis.get(t('identified_problems'), [])
-                                    for problem in identified:
-                                        problem_str = str(problem)
-                                        parts = problem_str.split(" - ", 1)
-                                        if len(parts) > 0:
-                                            category = parts[0]
-                                            if category in category_stats:
-                                                category_stats[category]["identified"] += 1
-                                
-                                # Update stats for each category
-                                for category, stats in category_stats.items():
-                                    badge_manager.update_category_stats(
-                                        user_id,
-                                        category,
-                                        stats["encountered"],
-                                        stats["identified"]
-                                    )
-                        except ImportError:
-                            logger.warning("Badge manager not available")
-                        except Exception as e:
-                            logger.error(f"Error updating category stats: {str(e)}")
+                # Category stats do not depend on the comparison report, so the
+                # DB writes run on a worker thread while the LLM call is in flight
+                stats_thread = None
+                try:
+                    if "auth" in st.session_state and st.session_state.auth.get("is_authenticated", False):
+                        user_id = st.session_state.auth.get("user_id")
+                        if user_id:
+                            category_stats = self._collect_category_stats(state, latest_review)
+                            if category_stats:
+                                thread = threading.Thread(
+                                    target=self._update_category_stats,
+                                    args=(user_id, category_stats),
+                                    daemon=True
+                                )
+                                add_script_run_ctx(thread)
+                                thread.start()
+                                stats_thread = thread
+                except Exception as e:
+                    # Stats are a side effect; the report is still generated
+                    logger.error(f"Error updating category stats: {str(e)}")
                 
+                try:
+                    if hasattr(self, "evaluator") and self.evaluator:
+                        state.comparison_report = self.evaluator.generate_comparison_report(
+                            found_errors,
+                            latest_review.analysis,
+                            converted_history
+                        )
+                        logger.debug(t("generated_comparison_report"))
+                finally:
+                    if stats_thread is not None:
+                        stats_thread.join()
                     
             except Exception as e:
                 logger.error(f"{t('error')} {t('generating_comparison_report')}: {str(e)}")
@@ -310,4 +288,59 @@ class WorkflowManager:
                     f"# {t('review_feedback')}\n\n"
                     f"{t('error_generating_report')} "
                     f"{t('check_review_history')}."
-                )
\ No newline at end of file
+                )
+
+    def _collect_category_stats(self, state: WorkflowState, latest_review: ReviewAttempt) -> Dict[str, Dict[str, int]]:
+        """
+        Count encountered and identified errors per category.
+        
+        Args:
+            state: Current workflow state
+            latest_review: Most recent review attempt
+            
+        Returns:
+            Dictionary mapping category to encountered/identified counts
+        """
+        category_stats = {}
+        if not state.evaluation_result or t('found_errors') not in state.evaluation_result:
+            return category_stats
+        
+        # Group by category
+        for error in state.evaluation_result[t('found_errors')]:
+            # Extract category from error string (e.g., "LOGICAL - Off-by-one error")
+            category = str(error).split(" - ", 1)[0]
+            if category not in category_stats:
+                category_stats[category] = {"encountered": 0, "identified": 0}
+            category_stats[category]["encountered"] += 1
+        
+        # Update identified counts from review analysis
+        if latest_review and latest_review.analysis:
+            for problem in latest_review.analysis.get(t('identified_problems'), []):
+                category = str(problem).split(" - ", 1)[0]
+                if category in category_stats:
+                    category_stats[category]["identified"] += 1
+        
+        return category_stats
+
+    def _update_category_stats(self, user_id: str, category_stats: Dict[str, Dict[str, int]]) -> None:
+        """
+        Persist per-category statistics for a user.
+        
+        Args:
+            user_id: The user's ID
+            category_stats: Output of _collect_category_stats
+        """
+        try:
+            from auth.badge_manager import BadgeManager
+            badge_manager = BadgeManager()
+            
+            # Update stats for all categories in one batch
+            badge_manager.update_category_stats_bulk(
+                user_id,
+                [(category, stats["encountered"], stats["identified"])
+                 for category, stats in category_stats.items()]
+            )
+        except ImportError:
+            logger.warning("Badge manager not available")
+        except Exception as e:
+            logger.error(f"Error updating category stats: {str(e)}")
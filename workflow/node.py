@@ -7,7 +7,7 @@ separating node logic from graph construction for better maintainability.
 
 import logging
 import re
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Callable
 
 from state_schema import WorkflowState, CodeSnippet
 from utils.code_utils import extract_both_code_versions, create_regeneration_prompt, get_error_count_from_state
@@ -40,13 +40,14 @@ class WorkflowNodes:
         self.error_repository = error_repository
         self.llm_logger = llm_logger
     
-    def generate_code_node(self, state: WorkflowState) -> WorkflowState:
+    def generate_code_node(self, state: WorkflowState, on_token: Optional[Callable[[str], None]] = None) -> WorkflowState:
         """
         Generate Java code with errors based on selected parameters.
         Ensures exact match between selected and generated errors.
         
         Args:
             state: Current workflow state
+            on_token: Optional callback that receives streamed code chunks
             
         Returns:
             Updated workflow state with generated code
@@ -66,8 +67,8 @@ class WorkflowNodes:
             # Randomly select a domain if not already set
             if not hasattr(state, "domain") or not state.domain:
                 # Use the domains from code_generator if available
-                if hasattr(self.code_generator, 'domains') and self.code_generator.domains:
-                    state.domain = random.choice(self.code_generator.domains)
+                if getattr(self.code_generator, 'DOMAINS', None):
+                    state.domain = random.choice(self.code_generator.DOMAINS)
                 else:
                     # Default domains if not available in code_generator
                     domains = [
@@ -128,7 +129,8 @@ class WorkflowNodes:
                 code_length=code_length,
                 difficulty_level=difficulty_level,
                 selected_errors=selected_errors,
-                domain=getattr(state, "domain", "")
+                domain=getattr(state, "domain", ""),
+                on_token=on_token
             )
 
             # Extract both annotated and clean versions
@@ -307,7 +309,8 @@ class WorkflowNodes:
                 # Use standard regeneration prompt but enhance it for clarity
                 if hasattr(self.code_evaluation, 'generate_improved_prompt'):
                     feedback = self.code_evaluation.generate_improved_prompt(
-                        code, requested_errors, evaluation_result
+                        code, requested_errors, evaluation_result,
+                        known_domain=getattr(state, "domain", None)
                     )
                 else:
                     # Use the regeneration prompt with emphasis on adding missing errors